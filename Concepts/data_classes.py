@@ -29,3 +29,14 @@ print(test)
 print(test.f1)
 print(test.label.name)
 print(test.label.value)
+
+
+'''
+label_metrics.py: the same record with slots and validation, f1="fds" is rejected
+'''
+import label_metrics
+
+try:
+    label_metrics.LabelMetrics(label=Label.TOMATO, num_actual_samples=1, precision=0.8, recall=0.34, f1="fds")
+except TypeError as e:
+    print(e)
@@ -10,3 +10,12 @@ print(df.to_dict('records'))
 
 
 print(list(df['u_knowledge']))
+
+
+# Lazy alternative: read-only row mappings backed by the column arrays, no list of dicts built up front
+from records_view import RecordsView, compact_frame
+
+for record in RecordsView(df):
+    print(dict(record))
+
+print(compact_frame(df).dtypes)
@@ -7,3 +7,11 @@ for i in input:
     y_pred.append(i[0]['label'])
 
 print(y_pred)
+
+
+# Columnar version: int32 label codes + vocabulary and float32 probabilities, no per-row list entries
+from prediction_decoder import decode_predictions
+
+columns = decode_predictions(input)
+print(columns.labels[columns.codes].tolist() == y_pred)
+print(columns.probs[:5])
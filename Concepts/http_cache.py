@@ -0,0 +1,296 @@
+'''
+Size-bounded on-disk HTTP response cache with conditional revalidation
+
+retrieve_json_from_url.py downloads the same JSON on every run. HttpCache keeps each response
+body on disk in one file per URL, with a JSON header line (url, ETag, Last-Modified, stored_at)
+in front of the body:
+- younger than ttl: served from disk, no request at all (a hit)
+- older: revalidated with If-None-Match / If-Modified-Since; a 304 serves the cached body and
+  restamps the entry, a 200 replaces it
+- the entries are kept under max_bytes by evicting the least recently used ones (the file mtime
+  is touched on every use)
+
+Several processes can share a directory: entries are written to a temporary file and moved in
+place with os.replace, so a reader sees either the old or the new entry, never a partial one,
+and writes plus eviction are serialised with an fcntl.flock on the directory lock file.
+
+The bytes used are kept as a running total in the .size file, updated under the lock, so a
+store does not look at the other entries. Only when the total goes over max_bytes is the
+directory scanned: the total is recomputed, entries are evicted down to EVICT_TO x max_bytes (so
+the next scan is many stores away) and .tmp files older than STALE_TMP_SECONDS, left behind by
+writers that crashed, are removed. A missing or unreadable .size file also triggers a scan.
+'''
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:
+    # no flock on Windows, a cache directory is then safe for a single process only
+    fcntl = None
+
+EVICT_TO = 0.9
+STALE_TMP_SECONDS = 3600
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    evictions: int = 0
+    stale_removed: int = 0
+    bytes_saved: int = 0
+
+
+def urlopen(url, headers):
+    """urllib opener returning the 304 response instead of raising it."""
+    try:
+        return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=10)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return e
+        raise
+
+
+class HttpCache:
+    def __init__(self, directory, ttl=300, max_bytes=64 * 2**20):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        self._lock_path = os.path.join(directory, '.lock')
+        self._size_path = os.path.join(directory, '.size')
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + '.entry')
+
+    def _count(self, field, saved=0):
+        with self._stats_lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+            self.stats.bytes_saved += saved
+
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_entry(self, url):
+        """(metadata, file positioned at the body) of the entry for url, or (None, None)."""
+        try:
+            f = open(self._path(url), 'rb')
+        except FileNotFoundError:
+            return None, None
+        try:
+            meta = json.loads(f.readline())
+        except ValueError:
+            meta = None
+        if meta is None or meta['url'] != url:
+            f.close()
+            return None, None
+        meta['size'] = os.fstat(f.fileno()).st_size - f.tell()
+        return meta, f
+
+    def _store(self, url, meta, body):
+        """Write meta + body (a binary file object) as the entry for url, return it positioned at the body."""
+        f = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.tmp', delete=False)
+        try:
+            f.write(json.dumps({key: value for key, value in meta.items() if key != 'size'}).encode() + b'\n')
+            start = f.tell()
+            shutil.copyfileobj(body, f)
+            f.flush()
+            size = f.tell()
+            path = self._path(url)
+            with self._locked():
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(f.name, path)
+                total = self._read_total()
+                total = self._scan() if total is None else total + size - replaced
+                if total > self.max_bytes:
+                    total = self._scan(evict=True)
+                self._write_total(total)
+        except BaseException:
+            f.close()
+            if os.path.exists(f.name):
+                os.remove(f.name)
+            raise
+        # the open handle stays valid even if another process replaces or evicts the entry
+        f.seek(start)
+        return f
+
+    def _read_total(self):
+        try:
+            with open(self._size_path) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_total(self, total):
+        with open(self._size_path, 'w') as f:
+            f.write(str(total))
+
+    def _scan(self, evict=False):
+        """The bytes used by the entries, after evicting down to EVICT_TO x max_bytes if evict; under the lock."""
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.entry'):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            elif entry.name.startswith('.tmp') and now - stat.st_mtime > STALE_TMP_SECONDS:
+                self._remove(entry.path)
+                self._count('stale_removed')
+        total = sum(size for _, size, _ in entries)
+        if evict:
+            for _, size, path in sorted(entries):
+                if total <= EVICT_TO * self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self._count('evictions')
+        return total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def open(self, url, opener=urlopen):
+        """Binary file object with the body of url, from disk when possible.
+
+        opener(url, headers) performs the GET and must return the 304 response rather than
+        raise it; JsonFetcher.open and urlopen above both do.
+        """
+        meta, cached = self._read_entry(url)
+        headers = {}
+        if meta is not None:
+            if time.time() - meta['stored_at'] < self.ttl:
+                self._touch(url)
+                self._count('hits', meta['size'])
+                return cached
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            response = opener(url, headers)
+        except BaseException:
+            if cached is not None:
+                cached.close()
+            raise
+        with response:
+            if meta is not None and response.status == 304:
+                response.read()
+                self._count('revalidated', meta['size'])
+                meta['stored_at'] = time.time()
+                with cached:
+                    return self._store(url, meta, cached)
+            if cached is not None:
+                cached.close()
+            self._count('misses')
+            if 'no-store' in (response.headers.get('Cache-Control') or ''):
+                return io.BytesIO(response.read())
+            meta = {'url': url, 'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'), 'stored_at': time.time()}
+            return self._store(url, meta, response)
+
+    def _touch(self, url):
+        try:
+            os.utime(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def fetch_json(self, url, opener=urlopen):
+        with self.open(url, opener) as f:
+            return json.load(f)
+
+
+def _fetch_in_process(args):
+    directory, urls = args
+    cache = HttpCache(directory, ttl=60)
+    return {url: len(cache.fetch_json(url)) for url in urls}, cache.stats
+
+
+if __name__ == '__main__':
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from multiprocessing import Pool
+
+    from json_fetcher import JsonFetcher
+
+    sent = {200: 0, 304: 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            n = int(self.path.rsplit('/', 1)[-1])
+            etag = f'"v1-{n}"'
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            else:
+                status, body = 200, json.dumps([{'id': i, 'name': f'item {i}'} for i in range(n)]).encode()
+            sent[status] += 1
+            self.send_response(status)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f'http://127.0.0.1:{server.server_port}/items/{n}' for n in range(1000, 1100)]
+    directory = tempfile.mkdtemp()
+
+    cache = HttpCache(directory, ttl=60)
+    fetcher = JsonFetcher(workers=8, cache=cache)
+    for run in range(2):
+        start_time = time.time()
+        results = dict(fetcher.fetch_all(urls))
+        print(f'run {run}: {time.time() - start_time} seconds, {cache.stats}, server sent {sent}')
+    assert all(len(results[url]) == int(url.rsplit('/', 1)[-1]) for url in urls)
+
+    # expired entries are revalidated: 304s, no bodies sent
+    cache.ttl = 0
+    assert [len(item) for item in fetcher.iter_json_items(urls[0])] == [2] * 1000
+    dict(fetcher.fetch_all(urls))
+    print(f'revalidated: {cache.stats}, server sent {sent}')
+    assert sent[200] == len(urls)
+
+    # the urllib flow of retrieve_json_from_url.py, sharing the directory with two other processes
+    with Pool(2) as pool:
+        for lengths, stats in pool.map(_fetch_in_process, [(directory, urls), (directory, urls[::-1])]):
+            assert lengths == {url: len(results[url]) for url in urls}
+            print(f'other process: {stats}')
+
+    # a byte budget of a dozen responses keeps only the most recently used ones
+    small = HttpCache(tempfile.mkdtemp(), ttl=60, max_bytes=10 * 40 * 1100)
+    for url in urls:
+        small.fetch_json(url)
+    print(f'bounded: {small.stats}, {len(os.listdir(small.directory)) - 1} entries on disk')
+    server.shutdown()
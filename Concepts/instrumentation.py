@@ -0,0 +1,241 @@
+'''
+Low-overhead profiling decorators and hot-path counters
+
+decorators.py shows how a decorator wraps a function. These decorators wrap it with measurements
+that feed one process-wide registry:
+- @timed: call count, total / min / max and a latency histogram with power-of-two nanosecond
+  buckets, so percentiles are approximate (within a factor of 2) but recording is O(1)
+- @counted: call count only
+- with span('name'): times a block, recorded like a @timed function
+
+Instrumentation is off unless the INSTRUMENTATION environment variable is set to 1, or enable()
+is called. Off, @timed and @counted return the function itself (no wrapper, zero cost per call)
+and span() returns a shared no-op context manager. The decision is taken when a function is
+decorated, so enable() must run before the instrumented modules are imported.
+
+snapshot() returns the metrics as a dict, export_text() / export_json() format it. The registry
+is per process: worker processes keep their own.
+'''
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get('INSTRUMENTATION') == '1'
+NUM_BUCKETS = 64
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+    def add(self, amount=1):
+        with self._lock:
+            self.count += amount
+
+    def summary(self):
+        return {'type': self.kind, 'count': self.count}
+
+
+class Histogram:
+    kind = 'timer'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = 0
+            # buckets[i] counts the durations d (in ns) with d.bit_length() == i, i.e. 2**(i-1) <= d < 2**i
+            self.buckets = [0] * NUM_BUCKETS
+
+    def record(self, elapsed_ns):
+        with self._lock:
+            self.count += 1
+            self.total += elapsed_ns
+            if self.min is None or elapsed_ns < self.min:
+                self.min = elapsed_ns
+            if elapsed_ns > self.max:
+                self.max = elapsed_ns
+            self.buckets[min(elapsed_ns.bit_length(), NUM_BUCKETS - 1)] += 1
+
+    def percentile(self, q):
+        """Upper bound (in ns) of the bucket holding the q-th percentile."""
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(2**i, self.max)
+        return self.max
+
+    def summary(self):
+        return {'type': self.kind, 'count': self.count,
+                'total_s': self.total / 1e9,
+                'mean_us': self.total / self.count / 1e3 if self.count else 0.0,
+                'min_us': (self.min or 0) / 1e3, 'max_us': self.max / 1e3,
+                'p50_us': self.percentile(50) / 1e3, 'p99_us': self.percentile(99) / 1e3,
+                'buckets': {2**i: count for i, count in enumerate(self.buckets) if count}}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, cls):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, cls())
+        if not isinstance(metric, cls):
+            raise TypeError(f'metric {name!r} is a {metric.kind}, not a {cls.kind}')
+        return metric
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def histogram(self, name):
+        return self._get(name, Histogram)
+
+    def snapshot(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {name: metric.summary() for name, metric in sorted(metrics.items())}
+
+    def reset(self):
+        # zeroed in place, decorated functions keep recording into the same objects
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+
+def _name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def timed(func=None, *, name=None, registry=REGISTRY):
+    """@timed or @timed(name='...'): record the latency of every call."""
+    if func is None:
+        return functools.partial(timed, name=name, registry=registry)
+    if not ENABLED:
+        return func
+    histogram = registry.histogram(name or _name(func))
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.record(perf_counter_ns() - start)
+    return wrapper
+
+
+def counted(func=None, *, name=None, registry=REGISTRY):
+    """@counted or @counted(name='...'): count the calls."""
+    if func is None:
+        return functools.partial(counted, name=name, registry=registry)
+    if not ENABLED:
+        return func
+    counter = registry.counter(name or _name(func))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counter.add()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+_NO_SPAN = nullcontext()
+
+
+@contextmanager
+def _span(histogram):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        histogram.record(time.perf_counter_ns() - start)
+
+
+def span(name, registry=REGISTRY):
+    """with span('load'): ... times the block."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _span(registry.histogram(name))
+
+
+def snapshot(registry=REGISTRY):
+    return registry.snapshot()
+
+
+def export_json(registry=REGISTRY, indent=None):
+    return json.dumps(registry.snapshot(), indent=indent)
+
+
+def export_text(registry=REGISTRY):
+    lines = [f'{"metric":<40} {"calls":>10} {"total s":>10} {"mean us":>10} {"p50 us":>10} {"p99 us":>10} {"max us":>10}']
+    for name, summary in registry.snapshot().items():
+        if summary['type'] == 'counter':
+            lines.append(f'{name:<40} {summary["count"]:>10}')
+        else:
+            lines.append(f'{name:<40} {summary["count"]:>10} {summary["total_s"]:>10.4f} {summary["mean_us"]:>10.2f} '
+                         f'{summary["p50_us"]:>10.2f} {summary["p99_us"]:>10.2f} {summary["max_us"]:>10.2f}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import timeit
+
+    documents = ['The Learn Python Challenge Casino.', 'They bought a car', 'Casinoville'] * 1000
+
+    def search(documents, keyword):
+        return [i for i, doc in enumerate(documents) if keyword in doc.lower().split()]
+
+    plain = search
+    enable(False)
+    assert timed(search) is search and counted(search) is search
+    print(f'disabled: {timeit.timeit(lambda: plain(documents[:3], "casino"), number=10**4)} seconds')
+    enable()
+    instrumented = timed(search)
+    print(f'enabled:  {timeit.timeit(lambda: instrumented(documents[:3], "casino"), number=10**4)} seconds')
+
+    # run as a script this file is __main__, the instrumented modules import it as instrumentation
+    import instrumentation
+    instrumentation.enable()
+    # word_search.py is decorated at import, now that instrumentation is on
+    from word_search import multi_word_search, word_search
+    for keyword in ['casino', 'car', 'python']:
+        word_search(documents, keyword)
+    multi_word_search(documents, ['casino', 'car'])
+    with instrumentation.span('demo.loop'):
+        sum(range(10**6))
+    print(instrumentation.export_text())
+    assert json.loads(instrumentation.export_json())['word_search.word_search']['count'] == 3
+    instrumentation.REGISTRY.reset()
+    word_search(documents, 'car')
+    assert instrumentation.snapshot()['word_search.word_search']['count'] == 1
@@ -0,0 +1,186 @@
+'''
+Concurrent, connection-pooled JSON fetcher
+
+retrieve_json_from_url.py does urlopen(url) + json.loads(response.read()): one URL at a time, a
+new TCP (and TLS) connection for every URL, and the whole body buffered before decoding.
+JsonFetcher
+- fetches many URLs on a bounded thread pool (HTTP waits release the GIL) and keeps at most
+  2 x workers requests in flight, so thousands of URLs do not become thousands of futures
+- keeps one keep-alive http.client connection per host in every worker thread and reuses it
+- applies a socket timeout and retries connection errors and 429 / 5xx with exponential backoff
+- decodes the body with json.load, or incrementally with iter_json_items for large arrays
+- with cache=HttpCache(...) bodies come from disk while fresh and are revalidated with
+  conditional GETs afterwards (http_cache.py)
+'''
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from json_stream import iter_json_array
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    def __init__(self, url, status, reason=''):
+        super().__init__(f'{url}: HTTP {status} {reason}'.strip())
+        self.url = url
+        self.status = status
+
+
+class JsonFetcher:
+    def __init__(self, workers=16, timeout=10.0, retries=3, backoff=0.5, headers=None, cache=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.headers = {'Accept': 'application/json', **(headers or {})}
+        self.cache = cache
+        self._local = threading.local()
+
+    def _connections(self):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        return connections
+
+    def _connection(self, scheme, netloc):
+        connections = self._connections()
+        connection = connections.get((scheme, netloc))
+        reused = connection is not None
+        if not reused:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connection = connections[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+        return connection, reused
+
+    def _drop_connection(self, scheme, netloc):
+        connection = self._connections().pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def open(self, url, headers=None):
+        """GET url and return the http.client response once its headers are in, retrying on failure.
+
+        The body must be read to the end (json.load, iter_json_array) before the next request
+        from the same thread, so that the connection can be reused.
+        """
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        attempt = 0
+        while True:
+            connection, reused = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers={**self.headers, **(headers or {})})
+                response = connection.getresponse()
+            except (OSError, http.client.HTTPException):
+                self._drop_connection(parts.scheme, parts.netloc)
+                if reused:
+                    # the server closed the idle keep-alive connection, a fresh one is not a retry
+                    continue
+                if attempt >= self.retries:
+                    raise
+            else:
+                if response.status < 400 or response.status == 304:
+                    return response
+                response.read()
+                if response.status not in RETRY_STATUSES or attempt >= self.retries:
+                    raise FetchError(url, response.status, response.reason)
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+    def _open_body(self, url):
+        return self.cache.open(url, self.open) if self.cache is not None else self.open(url)
+
+    def fetch_json(self, url):
+        with self._open_body(url) as response:
+            return json.load(response)
+
+    def iter_json_items(self, url):
+        """Yield the elements of the JSON array at url as they arrive."""
+        with self._open_body(url) as response:
+            yield from iter_json_array(response)
+
+    def fetch_all(self, urls, process=None):
+        """Yield (url, result) in input order; result is the decoded JSON, or the exception raised.
+
+        process(response) replaces json.load(response), e.g. to consume a large array with
+        iter_json_array without building it.
+        """
+        process = process or json.load
+
+        def fetch(url):
+            try:
+                with self._open_body(url) as response:
+                    return process(response)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            in_flight = deque()
+            for url in urls:
+                in_flight.append((url, executor.submit(fetch, url)))
+                if len(in_flight) >= 2 * self.workers:
+                    url, future = in_flight.popleft()
+                    yield url, future.result()
+            while in_flight:
+                url, future = in_flight.popleft()
+                yield url, future.result()
+
+
+if __name__ == '__main__':
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # local stand-in for the real service
+    connections = []
+    failures = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # without it delayed ACKs stall every keep-alive response by ~40 ms (headers and body are
+        # separate writes), which would be measured instead of the fetcher
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            connections.append(self.client_address)
+
+        def do_GET(self):
+            if self.path.startswith('/flaky') and failures.get(self.path, 0) < 2:
+                failures[self.path] = failures.get(self.path, 0) + 1
+                self._send(503, b'{}')
+            elif self.path.startswith('/missing'):
+                self._send(404, b'{}')
+            else:
+                n = int(self.path.rsplit('/', 1)[-1])
+                self._send(200, json.dumps([{'id': i, 'path': self.path} for i in range(n)]).encode())
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    fetcher = JsonFetcher(workers=8, timeout=5, retries=3, backoff=0.01)
+    urls = [f'{base}/items/{i % 50}' for i in range(2000)] + [f'{base}/flaky/3', f'{base}/missing/1']
+    start_time = time.time()
+    results = dict(fetcher.fetch_all(urls))
+    print(f'{len(urls)} urls: {time.time() - start_time} seconds over {len(connections)} connections')
+    assert results[f'{base}/items/7'] == [{'id': i, 'path': '/items/7'} for i in range(7)]
+    assert len(results[f'{base}/flaky/3']) == 3
+    assert isinstance(results[f'{base}/missing/1'], FetchError)
+    assert sum(1 for _ in fetcher.iter_json_items(f'{base}/items/100000')) == 100000
+    server.shutdown()
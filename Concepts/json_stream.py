@@ -0,0 +1,111 @@
+'''
+Incremental decoding of a large top-level JSON array
+
+json.load(fp) reads the whole document into one string and builds the whole list before returning.
+iter_json_array(fp) reads fp in chunks and yields the elements of the array one at a time with
+json.JSONDecoder.raw_decode, so only the current chunk and the current element are in memory.
+fp may be a text or a binary file (e.g. an HTTP response); bytes are decoded incrementally.
+
+An element that does not fit in the buffer is retried once the buffered part of it has at least
+doubled, not after every chunk, so a large element is decoded and copied O(log size) times
+instead of once per chunk.
+'''
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+NUMBER_START = '-0123456789'
+NUMBER_CHARS = NUMBER_START + '+.eE'
+
+
+def _chunks(fp, chunk_size, encoding):
+    decoder = None
+    while True:
+        chunk = fp.read(chunk_size)
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_json_array(fp, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """Yield the elements of the JSON array stored in fp, one at a time."""
+    decoder = json.JSONDecoder()
+    chunks = _chunks(fp, chunk_size, encoding)
+    buffer, pos, eof = '', 0, False
+
+    def fill(min_size=0):
+        # append chunks until at least min_size characters follow pos (one chunk at least) and drop
+        # the consumed prefix; False once fp is exhausted
+        nonlocal buffer, pos, eof
+        parts = [buffer[pos:]]
+        size = len(parts[0])
+        while not eof:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                break
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= min_size:
+                break
+        if len(parts) == 1:
+            return False
+        buffer, pos = ''.join(parts), 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] != '[':
+        raise ValueError('expected a JSON array')
+    pos += 1
+    first = True
+    while True:
+        skip_whitespace()
+        if pos == len(buffer):
+            raise ValueError('unterminated JSON array')
+        if buffer[pos] == ']':
+            return
+        if not first:
+            if buffer[pos] != ',':
+                raise ValueError(f"expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+            pos += 1
+            skip_whitespace()
+        first = False
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # incomplete (or invalid) element: double what is buffered of it before retrying
+                if fill(2 * (len(buffer) - pos)):
+                    continue
+                raise
+            # a number cut by the chunk boundary ('1' of '1.5') still decodes, so only accept
+            # it once something that cannot be part of a number follows it
+            if (buffer[pos] in NUMBER_START and not eof
+                    and all(c in NUMBER_CHARS for c in buffer[end:]) and fill()):
+                continue
+            break
+        pos = end
+        yield item
+
+
+if __name__ == '__main__':
+    import io
+
+    document = json.dumps([{'label': 'A1', 'prob': '0.23322147'}, 12345, [1, 2], 'text', None, 1.5e10] * 100)
+    assert list(iter_json_array(io.StringIO(document), chunk_size=7)) == json.loads(document)
+    assert list(iter_json_array(io.BytesIO(document.encode()), chunk_size=3)) == json.loads(document)
+    assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+    print(list(iter_json_array(io.StringIO('[1, "ü", {"a": [true]}]'), chunk_size=1)))
@@ -0,0 +1,264 @@
+'''
+Validated, slotted LabelMetrics and a columnar LabelMetricsTable
+
+data_classes.py's LabelMetrics is a regular frozen dataclass: every instance carries a __dict__
+and any value is accepted (f1="fds"). Here
+- LabelMetrics is a frozen dataclass with slots=True that checks its fields in __post_init__:
+  the count must be a non-negative integer, precision / recall / f1 numbers in [0, 1]
+- LabelMetricsTable keeps thousands of labels as columns: an int32 code per row into the list of
+  distinct labels, the support as int64 and precision / recall / f1 as float64 arrays. Weighted
+  averages, sorting and filtering are vectorised, save / load is an uncompressed .npz, and
+  table[i] returns a LabelMetricsRow, a view with the same attributes as LabelMetrics
+'''
+import numbers
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+
+SCORES = ('precision', 'recall', 'f1')
+
+
+@dataclass(frozen=True, slots=True)
+class LabelMetrics:
+    label: object
+    num_actual_samples: int
+    precision: float
+    recall: float
+    f1: float
+
+    def __post_init__(self):
+        count = self.num_actual_samples
+        if isinstance(count, bool) or not isinstance(count, numbers.Integral):
+            raise TypeError(f'num_actual_samples must be an integer, got {count!r}')
+        if count < 0:
+            raise ValueError(f'num_actual_samples must be >= 0, got {count}')
+        for name in SCORES:
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, numbers.Real):
+                raise TypeError(f'{name} must be a number, got {value!r}')
+            if not 0 <= value <= 1:
+                raise ValueError(f'{name} must be between 0 and 1, got {value}')
+
+
+class LabelMetricsRow:
+    """Row i of a LabelMetricsTable, read from its columns on access."""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def label(self):
+        return self._table.labels[self._table.codes[self._index]]
+
+    @property
+    def num_actual_samples(self):
+        return int(self._table.support[self._index])
+
+    @property
+    def precision(self):
+        return float(self._table.precision[self._index])
+
+    @property
+    def recall(self):
+        return float(self._table.recall[self._index])
+
+    @property
+    def f1(self):
+        return float(self._table.f1[self._index])
+
+    def to_record(self):
+        return LabelMetrics(self.label, self.num_actual_samples, self.precision, self.recall, self.f1)
+
+    def __repr__(self):
+        return repr(self.to_record()).replace('LabelMetrics(', 'LabelMetricsRow(', 1)
+
+
+class LabelMetricsTable:
+    def __init__(self, labels, codes, support, precision, recall, f1):
+        self.labels = list(labels)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.support = np.asarray(support, dtype=np.int64)
+        self.precision = np.asarray(precision, dtype=np.float64)
+        self.recall = np.asarray(recall, dtype=np.float64)
+        self.f1 = np.asarray(f1, dtype=np.float64)
+        columns = [self.codes, self.support, self.precision, self.recall, self.f1]
+        if any(column.shape != (len(self.codes),) for column in columns):
+            raise ValueError('all columns must be one-dimensional and of the same length')
+        if len(self.codes) and (self.codes.min() < 0 or self.codes.max() >= len(self.labels)):
+            raise ValueError('label codes out of range')
+        if (self.support < 0).any():
+            raise ValueError('num_actual_samples must be >= 0')
+        for name in SCORES:
+            column = getattr(self, name)
+            # also rejects NaN
+            if not ((column >= 0) & (column <= 1)).all():
+                raise ValueError(f'{name} must be between 0 and 1')
+
+    @classmethod
+    def from_columns(cls, labels, support, precision, recall, f1):
+        """One row per label, e.g. from ConfusionAccumulator.scores() or precision_recall_fscore_support."""
+        return cls(labels, np.arange(len(labels)), support, precision, recall, f1)
+
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        return cls.from_columns([r.label for r in records], [r.num_actual_samples for r in records],
+                                [r.precision for r in records], [r.recall for r in records], [r.f1 for r in records])
+
+    @classmethod
+    def from_break_down(cls, break_down):
+        """From the break_down list of confusion_matrix.py's output."""
+        return cls.from_columns([row['label'] for row in break_down], [row['support'] for row in break_down],
+                                [row['precision'] for row in break_down], [row['recall'] for row in break_down],
+                                [row['f1'] for row in break_down])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        """table[i] is a row view; a slice, boolean mask or index array gives a new table."""
+        if isinstance(index, numbers.Integral):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError('table index out of range')
+            return LabelMetricsRow(self, index)
+        return self._take(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield LabelMetricsRow(self, index)
+
+    def _take(self, index):
+        # the rows are selected, the label list is shared
+        return LabelMetricsTable(self.labels, self.codes[index], self.support[index],
+                                 self.precision[index], self.recall[index], self.f1[index])
+
+    def column(self, name):
+        return self.support if name == 'num_actual_samples' else getattr(self, name)
+
+    def weighted_average(self, name='f1'):
+        """Average of a score column weighted by the support, as in confusion_matrix.py."""
+        total = self.support.sum()
+        return float(np.dot(self.column(name), self.support) / total) if total else 0.0
+
+    def averages(self):
+        return {'average_performance': self.weighted_average('f1'),
+                'average_precision': self.weighted_average('precision'),
+                'average_recall': self.weighted_average('recall')}
+
+    def sort(self, by='f1', descending=False):
+        order = np.argsort(self.column(by), kind='stable')
+        return self._take(order[::-1] if descending else order)
+
+    def filter(self, mask):
+        return self._take(np.asarray(mask, dtype=bool))
+
+    def to_break_down(self):
+        return [{'label': row.label, 'f1': row.f1, 'precision': row.precision, 'recall': row.recall,
+                 'support': row.num_actual_samples} for row in self]
+
+    def save(self, path):
+        """Write the columns to an .npz; Enum labels are stored by value."""
+        labels = [label.value if isinstance(label, Enum) else label for label in self.labels]
+        np.savez(path, labels=np.array(labels), codes=self.codes, support=self.support,
+                 precision=self.precision, recall=self.recall, f1=self.f1)
+
+    @classmethod
+    def load(cls, path, label_type=None):
+        """Read a table written by save(); label_type (e.g. an Enum) converts the stored label values."""
+        with np.load(path, allow_pickle=False) as data:
+            labels = data['labels'].tolist()
+            if label_type is not None:
+                labels = [label_type(label) for label in labels]
+            return cls(labels, data['codes'], data['support'], data['precision'], data['recall'], data['f1'])
+
+
+if __name__ == '__main__':
+    import json
+    import os
+    import pickle
+    import tempfile
+    import time
+    import tracemalloc
+    from dataclasses import dataclass as plain_dataclass
+
+    class Label(Enum):
+        TOMATO = "tomato"
+        BANANA = "banana"
+        CHEESE = "cheese"
+
+    try:
+        LabelMetrics(label=Label.TOMATO, num_actual_samples=1, precision=0.8, recall=0.34, f1="fds")
+    except TypeError as e:
+        print(f'rejected: {e}')
+
+    table = LabelMetricsTable.from_records([LabelMetrics(Label.TOMATO, 10, 0.8, 0.4, 0.53),
+                                            LabelMetrics(Label.BANANA, 30, 0.9, 0.9, 0.9),
+                                            LabelMetrics(Label.CHEESE, 0, 0.0, 0.0, 0.0)])
+    print(table[0], table.averages())
+    assert table.sort('f1', descending=True)[0].label is Label.BANANA
+    assert len(table.filter(table.support > 0)) == 2
+    path = os.path.join(tempfile.mkdtemp(), 'labels.npz')
+    table.save(path)
+    assert LabelMetricsTable.load(path, Label)[2].to_record() == table[2].to_record()
+
+    @plain_dataclass(frozen=True)
+    class DictLabelMetrics:
+        label: str
+        num_actual_samples: int
+        precision: float
+        recall: float
+        f1: float
+
+    rng = np.random.default_rng(0)
+    n = 10**5
+    labels = [f'label-{i}' for i in range(n)]
+    support = rng.integers(0, 1000, n)
+    precision, recall, f1 = rng.random(n), rng.random(n), rng.random(n)
+
+    for name, build in [('dataclass', lambda: [DictLabelMetrics(*row) for row in zip(labels, support.tolist(), precision.tolist(), recall.tolist(), f1.tolist())]),
+                        ('slots dataclass', lambda: [LabelMetrics(*row) for row in zip(labels, support.tolist(), precision.tolist(), recall.tolist(), f1.tolist())]),
+                        ('table', lambda: LabelMetricsTable.from_columns(labels, support, precision, recall, f1))]:
+        start_time = time.time()
+        built = build()
+        elapsed = time.time() - start_time
+        # the memory on a separate build, tracemalloc slows every allocation down; the table
+        # shares the labels list, the records reference the same label strings
+        del built
+        tracemalloc.start()
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'{name}: {elapsed} seconds, {size / 2**20:.1f} MiB')
+    records = [LabelMetrics(*row) for row in zip(labels, support.tolist(), precision.tolist(), recall.tolist(), f1.tolist())]
+
+    start_time = time.time()
+    total = sum(r.num_actual_samples for r in records)
+    average = sum(r.f1 * r.num_actual_samples for r in records) / total
+    print(f'weighted f1, loop: {time.time() - start_time} seconds')
+    start_time = time.time()
+    assert np.isclose(built.weighted_average('f1'), average)
+    print(f'weighted f1, table: {time.time() - start_time} seconds')
+
+    directory = tempfile.mkdtemp()
+    start_time = time.time()
+    with open(os.path.join(directory, 'records.json'), 'w') as f:
+        json.dump(built.to_break_down(), f)
+    with open(os.path.join(directory, 'records.json')) as f:
+        LabelMetricsTable.from_break_down(json.load(f))
+    print(f'json save + load: {time.time() - start_time} seconds')
+    start_time = time.time()
+    with open(os.path.join(directory, 'records.pickle'), 'wb') as f:
+        pickle.dump(records, f)
+    with open(os.path.join(directory, 'records.pickle'), 'rb') as f:
+        pickle.load(f)
+    print(f'pickle save + load: {time.time() - start_time} seconds')
+    start_time = time.time()
+    built.save(os.path.join(directory, 'table.npz'))
+    loaded = LabelMetricsTable.load(os.path.join(directory, 'table.npz'))
+    print(f'npz save + load: {time.time() - start_time} seconds')
+    assert loaded.labels == labels and np.array_equal(loaded.f1, built.f1)
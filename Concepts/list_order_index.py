@@ -15,3 +15,10 @@ for ticket in tickets:
     for i in sorted_list:
         print(i[0])
         print(i[1])
+
+# Same order for all tickets at once, with partial selection of the top k
+from top_k import topk_indices
+
+indices, scores = topk_indices(tickets, k=3)
+print(indices)
+print(scores)
@@ -0,0 +1,237 @@
+'''
+Memoization decorator with LRU / TTL eviction, a byte budget and stampede protection
+
+functools.lru_cache bounds the number of entries only, never expires them and lets every thread
+that misses on the same key run the function. @memoize(maxsize=, ttl=, max_bytes=):
+- keys: the call is bound to the signature with defaults applied, so f(1, 2), f(1, b=2) and
+  f(a=1, b=2) share an entry; functools.partial arguments (partial_function.py) are keyed by
+  their function, args and keywords, so two equal partials hit the same entry
+- eviction: least recently used first once there are more than maxsize entries or their
+  estimated size exceeds max_bytes; entries older than ttl seconds are dropped when looked up
+- one computation per key: a thread missing on a key that is already being computed waits for
+  that result (or its exception) instead of computing it again
+- cache_info() returns hits, misses, evictions, expirations, the entry count and the bytes used
+
+Arguments must be hashable (or partials of hashable parts), as with lru_cache.
+'''
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'expirations', 'currsize', 'nbytes'])
+
+_Entry = namedtuple('_Entry', ['value', 'expires', 'size'])
+
+
+def sizeof(value, _seen=None):
+    """Estimated size in bytes: sys.getsizeof, summed over the contents of the builtin containers."""
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(k, seen) + sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sizeof(item, seen) for item in value)
+    return size
+
+
+def _normalize(value):
+    if isinstance(value, functools.partial):
+        return (functools.partial, _normalize(value.func), tuple(_normalize(arg) for arg in value.args),
+                tuple(sorted((k, _normalize(v)) for k, v in value.keywords.items())))
+    return value
+
+
+def _key_function(func):
+    try:
+        signature = inspect.signature(func)
+    except (TypeError, ValueError):
+        # builtins without a signature: positional and keyword arguments as given
+        def key(args, kwargs):
+            return (tuple(_normalize(arg) for arg in args),
+                    tuple(sorted((k, _normalize(v)) for k, v in kwargs.items())))
+        return key
+
+    def key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        parts = []
+        for name, value in bound.arguments.items():
+            kind = signature.parameters[name].kind
+            if kind is inspect.Parameter.VAR_POSITIONAL:
+                value = tuple(_normalize(arg) for arg in value)
+            elif kind is inspect.Parameter.VAR_KEYWORD:
+                value = tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+            else:
+                value = _normalize(value)
+            parts.append((name, value))
+        return tuple(parts)
+    return key
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def memoize(func=None, *, maxsize=128, ttl=None, max_bytes=None, sizeof=sizeof):
+    """@memoize or @memoize(maxsize=1024, ttl=60, max_bytes=2**20); maxsize=None means unbounded."""
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize, ttl=ttl, max_bytes=max_bytes, sizeof=sizeof)
+
+    make_key = _key_function(func)
+    cache = OrderedDict()
+    in_flight = {}
+    lock = threading.Lock()
+    stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'nbytes': 0}
+
+    def evict():
+        while cache and ((maxsize is not None and len(cache) > maxsize)
+                         or (max_bytes is not None and stats['nbytes'] > max_bytes)):
+            _, entry = cache.popitem(last=False)
+            stats['nbytes'] -= entry.size
+            stats['evictions'] += 1
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs)
+        with lock:
+            entry = cache.get(key)
+            if entry is not None:
+                if entry.expires is None or entry.expires > time.monotonic():
+                    cache.move_to_end(key)
+                    stats['hits'] += 1
+                    return entry.value
+                del cache[key]
+                stats['nbytes'] -= entry.size
+                stats['expirations'] += 1
+            pending = in_flight.get(key)
+            if pending is None:
+                pending = in_flight[key] = _InFlight()
+                owner = True
+                stats['misses'] += 1
+            else:
+                owner = False
+                stats['hits'] += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = func(*args, **kwargs)
+        except BaseException as e:
+            pending.error = e
+            raise
+        else:
+            pending.value = value
+            size = sizeof(value) if max_bytes is not None else 0
+            with lock:
+                # a value bigger than the whole budget is returned but not kept
+                if max_bytes is None or size <= max_bytes:
+                    cache[key] = _Entry(value, time.monotonic() + ttl if ttl is not None else None, size)
+                    stats['nbytes'] += size
+                    evict()
+            return value
+        finally:
+            with lock:
+                del in_flight[key]
+            pending.done.set()
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats['hits'], stats['misses'], stats['evictions'], stats['expirations'],
+                             len(cache), stats['nbytes'])
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats.update(hits=0, misses=0, evictions=0, expirations=0, nbytes=0)
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+if __name__ == '__main__':
+    from concurrent.futures import ThreadPoolExecutor
+    from functools import partial
+
+    calls = []
+
+    @memoize(maxsize=2)
+    def base_func(a, b, c=0):
+        calls.append((a, b, c))
+        return a + b + c
+
+    assert base_func(1, 2) == base_func(1, b=2) == base_func(a=1, b=2, c=0) == 3
+    assert len(calls) == 1
+    base_func(2, 2)
+    base_func(3, 2)
+    print(base_func.cache_info())
+    assert base_func.cache_info().evictions == 1
+
+    # equal partials (partial_function.py) share one entry
+    @memoize
+    def apply(f, x):
+        calls.append(f)
+        return f(x)
+
+    calls.clear()
+    apply(partial(pow, exp=2), 3)
+    apply(partial(pow, exp=2), 3)
+    assert len(calls) == 1
+
+    # ttl
+    @memoize(ttl=0.05)
+    def now():
+        return time.monotonic()
+
+    first = now()
+    assert now() == first
+    time.sleep(0.06)
+    assert now() != first
+    print(now.cache_info())
+
+    # byte budget: about 10 lists of 1000 floats
+    @memoize(maxsize=None, max_bytes=10 * sizeof([0.5] * 1000))
+    def vector(seed):
+        return [seed + 0.5] * 1000
+
+    for seed in range(100):
+        vector(seed)
+    print(vector.cache_info())
+    assert vector.cache_info().currsize == 10
+
+    # 16 threads asking for the same slow key: computed once
+    @memoize
+    def slow_lookup(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return key.upper()
+
+    calls.clear()
+    with ThreadPoolExecutor(16) as executor:
+        assert set(executor.map(slow_lookup, ['user-1'] * 16)) == {'USER-1'}
+    assert calls == ['user-1']
+    print(slow_lookup.cache_info())
+
+    @functools.lru_cache(maxsize=None)
+    def slow_lookup_lru(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return key.upper()
+
+    calls.clear()
+    with ThreadPoolExecutor(16) as executor:
+        list(executor.map(slow_lookup_lru, ['user-1'] * 16))
+    print(f'lru_cache ran the same lookup {len(calls)} times')
@@ -15,4 +15,7 @@ if __name__ == '__main__':
         p = multiprocessing.Process(target=worker)
         jobs.append(p)
         p.start()
+    # wait for the workers, otherwise the run time only covers starting them
+    for p in jobs:
+        p.join()
     print(f"Finshed, run time is: {time.time() - start_time}")
@@ -0,0 +1,199 @@
+'''
+Composable lazy generator pipeline
+
+generator_and_yield.py shows a single generator. Pipeline chains them, so a
+read -> parse -> filter -> score -> write job streams one item at a time instead of building a
+list after every step:
+
+    Pipeline(open(path)).map(json.loads).filter(is_valid).batch(1000) \\
+        .parallel_map(score_batch, workers=4).unbatch()
+
+- every stage is a generator pulling from the one before, nothing runs until the pipeline is
+  iterated and memory does not grow with the input
+- parallel_map keeps at most max_pending items in flight (2 x workers by default) and yields
+  the results in input order, so a slow consumer stops the source from being read ahead
+- every stage counts its items and its own time (time spent in the stage minus the time spent
+  waiting on the stage before it); report() shows where the time goes
+'''
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        # time spent producing this stage's items, including the stages before it
+        self.total = 0.0
+
+
+def _counted(iterator, stats):
+    iterator = iter(iterator)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stats.total += time.perf_counter() - start
+            return
+        stats.total += time.perf_counter() - start
+        stats.items += 1
+        yield item
+
+
+def _batch(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _unbatch(batches):
+    for batch in batches:
+        yield from batch
+
+
+def _parallel_map(items, func, workers, max_pending, processes):
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(workers) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # the consumer stopped early (or a task raised): drop the work not started yet
+            for future in pending:
+                future.cancel()
+
+
+def _func_name(func):
+    # partial objects and callable instances have no __name__
+    return getattr(func, '__name__', repr(func))
+
+
+class Pipeline:
+    def __init__(self, source, name='source'):
+        self._source = source
+        self._stages = [(name, None)]
+        # zero counts until the pipeline is iterated, every iteration starts new ones
+        self.stats = [StageStats(name)]
+
+    def _add(self, name, stage):
+        self._stages.append((name, stage))
+        self.stats.append(StageStats(name))
+        return self
+
+    def map(self, func, name=None):
+        return self._add(name or f'map({_func_name(func)})', lambda items: map(func, items))
+
+    def filter(self, predicate, name=None):
+        return self._add(name or f'filter({_func_name(predicate)})', lambda items: filter(predicate, items))
+
+    def batch(self, size):
+        return self._add(f'batch({size})', lambda items: _batch(items, size))
+
+    def unbatch(self):
+        return self._add('unbatch', _unbatch)
+
+    def parallel_map(self, func, workers=4, max_pending=None, processes=False, name=None):
+        """map func over the items on a thread pool (or a process pool), results in input order.
+
+        Threads suit I/O and functions that release the GIL; with processes=True func must be
+        picklable and is best given whole batches, so a task is worth the round trip.
+        """
+        max_pending = max_pending or 2 * workers
+        return self._add(name or f'parallel_map({_func_name(func)}, {workers})',
+                         lambda items: _parallel_map(items, func, workers, max_pending, processes))
+
+    def __iter__(self):
+        self.stats = [StageStats(name) for name, _ in self._stages]
+        items = _counted(self._source, self.stats[0])
+        for (_, stage), stats in zip(self._stages[1:], self.stats[1:]):
+            items = _counted(stage(items), stats)
+        return items
+
+    def run(self, sink=None):
+        """Drain the pipeline, passing every item to sink; returns the number of items."""
+        count = 0
+        for item in self:
+            if sink is not None:
+                sink(item)
+            count += 1
+        return count
+
+    def report(self):
+        lines = []
+        upstream = 0.0
+        for stats in self.stats:
+            own = max(stats.total - upstream, 0.0)
+            rate = stats.items / own if own else float('inf') if stats.items else 0.0
+            lines.append(f'{stats.name:<30} {stats.items:>10} items {own:>9.3f} s {rate:>14,.0f} items/s')
+            upstream = stats.total
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import functools
+    import hashlib
+    import json
+    import tracemalloc
+
+    def read(n):
+        for i in range(n):
+            yield json.dumps({'id': i, 'text': f'document {i} ' * 8})
+
+    def is_even(record):
+        return record['id'] % 2 == 0
+
+    def score(record):
+        # hashlib releases the GIL for large inputs, a stand-in for a model call
+        return record['id'], hashlib.sha256(record['text'].encode() * 200).hexdigest()[:8]
+
+    def score_batch(records):
+        return [score(record) for record in records]
+
+    assert list(Pipeline(range(10)).map(lambda x: x * x).filter(lambda x: x % 2).batch(3).unbatch()) == \
+        [x * x for x in range(10) if x * x % 2]
+    assert list(Pipeline(range(1000)).parallel_map(str, workers=8)) == [str(x) for x in range(1000)]
+
+    def with_lists(n):
+        records = [json.loads(line) for line in read(n)]
+        records = [record for record in records if is_even(record)]
+        return [score(record) for record in records]
+
+    def with_pipeline(n):
+        return Pipeline(read(n)).map(json.loads).filter(is_even).batch(500) \
+            .parallel_map(score_batch, workers=4).unbatch()
+
+    # partial objects as stages, report() before the pipeline has run
+    pipeline = Pipeline(range(10)).map(functools.partial(pow, 2)).filter(functools.partial(int.__lt__, 100))
+    print(pipeline.report())
+    assert list(pipeline) == [128, 256, 512]
+
+    n = 2 * 10**5
+    start_time = time.time()
+    scores = with_lists(n)
+    print(f'lists: {time.time() - start_time} seconds')
+    start_time = time.time()
+    pipeline = with_pipeline(n)
+    assert list(pipeline) == scores
+    print(f'pipeline: {time.time() - start_time} seconds')
+    print(pipeline.report())
+
+    # peak memory of the steps alone, the pipeline drained without keeping its results
+    tracemalloc.start()
+    with_lists(n)
+    print(f'lists: peak {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MiB')
+    tracemalloc.stop()
+    tracemalloc.start()
+    with_pipeline(n).run()
+    print(f'pipeline: peak {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MiB')
+    tracemalloc.stop()
@@ -0,0 +1,113 @@
+'''
+Columnar decoder for nested prediction payloads
+
+dict_extract_key_value.py walks [[{'label': 'A1', 'prob': '0.233'}], ...] with a Python loop and
+append, and keeps one string per row. decode_predictions streams the same payload, from an
+in-memory list, a .json file holding the array or a .jsonl file with one row per line, into:
+- codes: int32 label code per row
+- labels: the label vocabulary, so labels[codes] gives back the label of every row. Its dtype
+  follows the labels: str for string labels, int for int class ids, object for a mix, so the
+  decoded labels compare equal to the originals
+- probs: float32 probability per row
+
+Rows are decoded one at a time and dropped; the columns grow in array.array buffers (4 bytes per
+row each) and are handed to numpy without a copy. A million rows take 8 MB instead of a list of
+a million dicts and strings.
+'''
+import json
+import os
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+from json_stream import iter_json_array
+
+PredictionColumns = namedtuple('PredictionColumns', ['codes', 'labels', 'probs'])
+
+
+def _iter_rows(source, encoding):
+    path = os.fspath(source)
+    with open(path, 'rb') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f, encoding=encoding)
+
+
+def _label_array(vocabulary):
+    labels = list(vocabulary)
+    types = {type(label) for label in labels}
+    if types <= {str}:
+        return np.array(labels, dtype=str)
+    if all(issubclass(t, (int, float)) for t in types):
+        # int and float ids (bool included) share a numeric dtype, as in np.asarray
+        return np.asarray(labels)
+    # numpy would turn a str / number mix into strings
+    return np.array(labels, dtype=object)
+
+
+def decode_predictions(source, encoding='utf-8'):
+    """Decode [[{'label': ..., 'prob': ...}], ...] rows (top prediction first) into PredictionColumns."""
+    rows = _iter_rows(source, encoding) if isinstance(source, (str, os.PathLike)) else source
+    vocabulary = {}
+    codes = array('i')
+    probs = array('f')
+    for row in rows:
+        prediction = row[0]
+        codes.append(vocabulary.setdefault(prediction['label'], len(vocabulary)))
+        probs.append(float(prediction['prob']))
+    return PredictionColumns(
+        codes=np.frombuffer(codes, dtype=np.intc) if codes else np.empty(0, dtype=np.intc),
+        labels=_label_array(vocabulary),
+        probs=np.frombuffer(probs, dtype=np.float32) if probs else np.empty(0, dtype=np.float32))
+
+
+if __name__ == '__main__':
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    random.seed(0)
+    payload = [[{'label': random.choice(['A1', 'A2', 'A3', 'A4', 'A5']), 'prob': str(random.random())}]
+               for _ in range(2 * 10**5)]
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, 'predictions.json'), 'w') as f:
+        json.dump(payload, f)
+    with open(os.path.join(directory, 'predictions.jsonl'), 'w') as f:
+        f.writelines(json.dumps(row) + '\n' for row in payload)
+
+    for source in [payload, os.path.join(directory, 'predictions.json'), os.path.join(directory, 'predictions.jsonl')]:
+        start_time = time.time()
+        columns = decode_predictions(source)
+        run_time = time.time() - start_time
+        # measured on a separate run, tracemalloc slows every allocation down
+        tracemalloc.start()
+        decode_predictions(source)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        name = source if isinstance(source, str) else 'in-memory list'
+        print(f'{name}: {run_time} seconds, peak {peak / 2**20:.1f} MiB')
+
+    y_pred = [row[0]['label'] for row in payload]
+    assert columns.labels[columns.codes].tolist() == y_pred
+    assert np.allclose(columns.probs, [float(row[0]['prob']) for row in payload])
+
+    start_time = time.time()
+    with open(os.path.join(directory, 'predictions.json')) as f:
+        y_pred = [row[0]['label'] for row in json.load(f)]
+    run_time = time.time() - start_time
+    tracemalloc.start()
+    with open(os.path.join(directory, 'predictions.json')) as f:
+        y_pred = [row[0]['label'] for row in json.load(f)]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'json.load + list of labels: {run_time} seconds, peak {peak / 2**20:.1f} MiB')
+
+    # int class ids stay ints, a mix of ids and names stays as given
+    for ids in [[3, 7, 3], [3, 'A1', 3]]:
+        columns = decode_predictions([[{'label': label, 'prob': '0.5'}] for label in ids])
+        assert columns.labels[columns.codes].tolist() == ids
@@ -0,0 +1,213 @@
+'''
+Lazy records view and compact JSON export for DataFrame -> records
+
+df.to_dict('records') builds one dict per row up front, and every repeated value such as
+"sap marketing" or "Process Issue" is referenced once per row and encoded once per row when the
+records are serialised.
+
+- RecordsView(df) is a sequence of read-only row mappings. A row only holds (view, position) and
+  reads its values from the column arrays on access, so nothing is built per row up front.
+- compact_frame(df) turns low-cardinality string columns into categoricals (int codes plus a few
+  distinct values) or, with how='intern', into sys.intern'ed strings shared by every row.
+- iter_json_records / export_jsonl write JSON lines: every distinct categorical value is encoded
+  once and the lines are assembled from the pre-encoded fragments by code. Missing values (None,
+  NaN, NaT, pd.NA) and infinities are written as null, as df.to_json does, and timestamps,
+  datetimes, dates and timedeltas as ISO 8601 strings (isoformat).
+'''
+import datetime
+import json
+import math
+import sys
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 10**5
+
+
+def _python_value(value):
+    # numpy scalars -> int / float / bool and pd.NA -> None, as to_dict('records') returns
+    if value is pd.NA:
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _column_values(series):
+    # to_numpy is a view for numeric columns; for categoricals it materialises the values once.
+    # Datetime, timedelta and nullable columns keep their pandas scalars (Timestamp, NaT, pd.NA):
+    # to_numpy would turn them into numpy datetime64 or float.
+    if isinstance(series.dtype, pd.CategoricalDtype) or (
+            isinstance(series.dtype, np.dtype) and series.dtype.kind not in 'mM'):
+        return series.to_numpy()
+    return series.array
+
+
+class RowView(Mapping):
+    __slots__ = ('_view', '_position')
+
+    def __init__(self, view, position):
+        self._view = view
+        self._position = position
+
+    def __getitem__(self, column):
+        return _python_value(self._view._arrays[self._view._column_index[column]][self._position])
+
+    def __iter__(self):
+        return iter(self._view.columns)
+
+    def __len__(self):
+        return len(self._view.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class RecordsView(Sequence):
+    """Read-only, row-by-row view of df with the same content as df.to_dict('records')."""
+
+    def __init__(self, df):
+        self.columns = tuple(df.columns)
+        self._column_index = {column: i for i, column in enumerate(self.columns)}
+        self._arrays = [_column_values(df[column]) for column in self.columns]
+        self._length = len(df)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [RowView(self, i) for i in range(*position.indices(self._length))]
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError('records view index out of range')
+        return RowView(self, position)
+
+    def __iter__(self):
+        for position in range(self._length):
+            yield RowView(self, position)
+
+    def __len__(self):
+        return self._length
+
+
+def _is_text(series):
+    return not isinstance(series.dtype, pd.CategoricalDtype) and (
+        pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series))
+
+
+def compact_frame(df, max_unique_ratio=0.5, how='category'):
+    """Copy of df with the text columns of at most max_unique_ratio distinct values per row compacted."""
+    if how not in ('category', 'intern'):
+        raise ValueError(f"how must be 'category' or 'intern', got {how!r}")
+    df = df.copy(deep=False)
+    for column in df.columns:
+        series = df[column]
+        if not _is_text(series) or series.nunique() > max_unique_ratio * len(series):
+            continue
+        if how == 'category':
+            df[column] = series.astype('category')
+        else:
+            interned = [sys.intern(value) if isinstance(value, str) else value for value in series.tolist()]
+            df[column] = pd.Series(interned, index=series.index, dtype=object)
+    return df
+
+
+def _encode(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return 'null'
+    if isinstance(value, float):
+        return json.dumps(value) if math.isfinite(value) else 'null'
+    if isinstance(value, (datetime.date, datetime.time, pd.Timedelta)):
+        return '"' + value.isoformat() + '"'
+    return json.dumps(value)
+
+
+def _encoded_column(key, series, start, end):
+    prefix = json.dumps(str(key)) + ':'
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # one encoded fragment per category, the extra last one is for missing values (code -1)
+        fragments = np.array([prefix + _encode(_python_value(category)) for category in series.cat.categories]
+                             + [prefix + 'null'], dtype=object)
+        return fragments[series.cat.codes.to_numpy()[start:end]]
+    return [prefix + _encode(value) for value in series.iloc[start:end].tolist()]
+
+
+def iter_json_records(df, chunk_size=CHUNK_SIZE):
+    """Yield one JSON object per row, the records of df.to_dict('records') encoded as in the module docstring."""
+    for start in range(0, len(df), chunk_size):
+        end = start + chunk_size
+        columns = [_encoded_column(key, df[key], start, end) for key in df.columns]
+        for parts in zip(*columns):
+            yield '{' + ','.join(parts) + '}'
+
+
+def export_jsonl(df, path, chunk_size=CHUNK_SIZE, max_unique_ratio=0.5):
+    """Write df as JSON lines, compacting its low-cardinality text columns first."""
+    df = compact_frame(df, max_unique_ratio)
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in iter_json_records(df, chunk_size):
+            f.write(line)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    header = ["u_knowledge", "assignment_group", "ticket_management", "category"]
+    row = ["A5", "sap marketing", "athos", "Process Issue"]
+    df = pd.DataFrame([row, ["A1", None, "athos", "Other"], row], columns=header)
+    df['priority'] = [1, 2, float('nan')]
+    records = RecordsView(df)
+    assert dict(records[0]) == df.to_dict('records')[0]
+    print(records[0], len(records))
+    assert [json.loads(line) for line in iter_json_records(compact_frame(df))] == \
+        json.loads(df.to_json(orient='records'))
+
+    # datetimes, nullable integers and infinities
+    df = pd.DataFrame({'opened': pd.to_datetime(['2020-01-01 10:00', None]),
+                       'closed': pd.to_datetime(['2020-01-02 09:30', '2020-01-03 00:00']).tz_localize('UTC'),
+                       'reopened': pd.array([1, None], dtype='Int64'),
+                       'ratio': [float('inf'), 0.5],
+                       'status': pd.Categorical(['open', None])})
+    records = RecordsView(df)
+    assert [dict(row) for row in records] == df.to_dict('records')
+    assert [json.loads(line) for line in iter_json_records(df)] == [
+        {'opened': '2020-01-01T10:00:00', 'closed': '2020-01-02T09:30:00+00:00', 'reopened': 1, 'ratio': None,
+         'status': 'open'},
+        {'opened': None, 'closed': '2020-01-03T00:00:00+00:00', 'reopened': None, 'ratio': 0.5, 'status': None}]
+
+    rng = np.random.default_rng(0)
+    n = 5 * 10**5
+    groups = ['sap marketing', 'sap finance', 'sap hr', 'service desk']
+    categories = ['Process Issue', 'Access', 'Bug', 'Question']
+    df = pd.DataFrame({'u_knowledge': [f'A{i}' for i in rng.integers(0, 20, n)],
+                       'assignment_group': [groups[i] for i in rng.integers(0, len(groups), n)],
+                       'ticket_management': 'athos',
+                       'category': [categories[i] for i in rng.integers(0, len(categories), n)],
+                       'priority': rng.integers(1, 5, n)})
+
+    tracemalloc.start()
+    records = df.to_dict('records')
+    print(f"to_dict('records'): {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MiB")
+    tracemalloc.stop()
+    del records
+    tracemalloc.start()
+    records = RecordsView(df)
+    print(f'RecordsView: {tracemalloc.get_traced_memory()[0] / 2**20:.1f} MiB')
+    tracemalloc.stop()
+    print(f'frame: {df.memory_usage(deep=True).sum() / 2**20:.1f} MiB, '
+          f'compacted: {compact_frame(df).memory_usage(deep=True).sum() / 2**20:.1f} MiB')
+
+    directory = tempfile.mkdtemp()
+    start_time = time.time()
+    with open(os.path.join(directory, 'to_dict.jsonl'), 'w') as f:
+        for record in df.to_dict('records'):
+            f.write(json.dumps(record) + '\n')
+    print(f'to_dict + json.dumps: {time.time() - start_time} seconds')
+    start_time = time.time()
+    export_jsonl(df, os.path.join(directory, 'export.jsonl'))
+    print(f'export_jsonl: {time.time() - start_time} seconds')
+    with open(os.path.join(directory, 'to_dict.jsonl')) as f1, open(os.path.join(directory, 'export.jsonl')) as f2:
+        assert all(json.loads(a) == json.loads(b) for a, b in zip(f1, f2))
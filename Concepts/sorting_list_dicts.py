@@ -1,3 +1,5 @@
+from top_n import top_n
+
 list_dicts = [{"key": 'test1', "order": 3}, {"key": 'test2', "order": 2}, {"key": 'test3', "order": 1}]
 
 sorted_list = sorted(list_dicts, key=lambda element: element['order'], reverse=True)[:2]
@@ -7,4 +9,16 @@ for i in sorted_list:
     print(i['key'])
 
 
-print(sorted_list)
\ No newline at end of file
+print(sorted_list)
+# sorted_list holds the same dicts as list_dicts, so list_dicts was edited too
+print(list_dicts)
+
+# top_n (top_n.py) returns copies: editing them leaves list_dicts as it is
+top_list = top_n(list_dicts, 'order', 2, copy_records=True)
+
+for i in top_list:
+    i['key'] = i['key'] + 'edited'
+    print(i['key'])
+
+print(top_list)
+print(list_dicts)
@@ -0,0 +1,97 @@
+'''
+Batched top-k indices for a (tickets x classes) probability matrix
+
+list_order_index.py sorts every ticket with sorted(enumerate(ticket), key=..., reverse=True),
+which is O(classes log classes) Python work per ticket. topk_indices does it for all tickets at
+once with partial selection:
+1. np.partition finds the k-th largest score of every row in O(classes)
+2. the winners are the scores above it plus, for ties at that score, the lowest indices
+3. only the k winners are sorted
+
+sorted(..., reverse=True) is stable, so equal scores keep their original (ascending index)
+order; step 2 and the stable sort in step 3 give exactly the same order. In chunked mode rows are
+processed chunk_size at a time, bounding the temporaries to chunk_size x classes.
+
+NaN scores are rejected with a ValueError: NaN compares false with everything, so sorted() gives
+no defined order for them and the partition threshold would not select k entries per row.
+Replace them first, e.g. np.nan_to_num(matrix, nan=-np.inf) to rank them lowest.
+'''
+import numpy as np
+
+
+def _topk_rows(matrix, k):
+    num_classes = matrix.shape[1]
+    threshold = np.partition(matrix, num_classes - k, axis=1)[:, num_classes - k, None]
+    above = matrix > threshold
+    tied = matrix == threshold
+    # keep the first (k - number above) tied entries of every row, as a stable sort would
+    needed = k - above.sum(axis=1, keepdims=True)
+    selected = above | (tied & (np.cumsum(tied, axis=1) <= needed))
+    # exactly k per row, and nonzero walks row by row in ascending index order
+    indices = np.nonzero(selected)[1].reshape(len(matrix), k)
+    scores = np.take_along_axis(matrix, indices, axis=1)
+    # descending stable sort (ties by lowest index) without negating, so unsigned dtypes work too:
+    # stable ascending sort of the reversed row, then reverse the result
+    order = (k - 1 - np.argsort(scores[:, ::-1], axis=1, kind='stable'))[:, ::-1]
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def topk_indices(matrix, k, chunk_size=None):
+    """(indices, scores) of the k highest scores of every row, highest first, ties by lowest index."""
+    matrix = np.asarray(matrix)
+    if matrix.ndim != 2:
+        raise ValueError(f'expected a 2-d matrix, got shape {matrix.shape}')
+    num_rows, num_classes = matrix.shape
+    if not 0 < k <= num_classes:
+        raise ValueError(f'k must be between 1 and {num_classes}, got {k}')
+    if np.issubdtype(matrix.dtype, np.inexact) and np.isnan(matrix).any():
+        raise ValueError('matrix contains NaN scores, replace them first (see the module docstring)')
+    if chunk_size is None or chunk_size >= num_rows:
+        return _topk_rows(matrix, k)
+    indices = np.empty((num_rows, k), dtype=np.intp)
+    scores = np.empty((num_rows, k), dtype=matrix.dtype)
+    for start in range(0, num_rows, chunk_size):
+        end = start + chunk_size
+        indices[start:end], scores[start:end] = _topk_rows(matrix[start:end], k)
+    return indices, scores
+
+
+if __name__ == '__main__':
+    import time
+
+    tickets = [
+        [0.23486008, 0.1902059,  0.19009577, 0.19272467, 0.19211353],
+        [0.20444456, 0.1977669,  0.19765238, 0.20038578, 0.19975035]
+    ]
+    indices, scores = topk_indices(tickets, 5)
+    print(indices)
+    print(scores)
+
+    # same order as sorted(enumerate(ticket), ...), ties included
+    rng = np.random.default_rng(0)
+    matrix = rng.integers(0, 5, size=(2000, 50)).astype(np.float64)
+    for k in [1, 3, 50]:
+        indices, scores = topk_indices(matrix, k, chunk_size=300)
+        for row, row_indices in zip(matrix, indices):
+            expected = [i for i, _ in sorted(enumerate(row), key=lambda x: x[1], reverse=True)[:k]]
+            assert row_indices.tolist() == expected
+
+    matrix[0, 0] = np.nan
+    try:
+        topk_indices(matrix, 3)
+    except ValueError as e:
+        print(e)
+    indices, _ = topk_indices(np.nan_to_num(matrix, nan=-np.inf), 50)
+    assert indices[0, -1] == 0
+
+    matrix = rng.random((10**5, 300), dtype=np.float32)
+    start_time = time.time()
+    topk_indices(matrix, 5, chunk_size=10**4)
+    print(f'topk_indices_time: {time.time() - start_time} seconds')
+    start_time = time.time()
+    np.argsort(-matrix, axis=1, kind='stable')[:, :5]
+    print(f'full_argsort_time: {time.time() - start_time} seconds')
+    start_time = time.time()
+    for ticket in matrix[:10**4].tolist():
+        sorted(enumerate(ticket), key=lambda x: x[1], reverse=True)[:5]
+    print(f'sorted_time (10% of the rows): {time.time() - start_time} seconds')
@@ -0,0 +1,49 @@
+'''
+Top n records of a list of dicts without sorting the whole list
+
+sorted(records, key=..., reverse=True)[:n] sorts every record to keep n of them, and the slice
+holds the same dict objects as the source, so editing the result edits the source
+(sorting_list_dicts.py shows both).
+
+top_n(records, key, n) uses heapq.nlargest / nsmallest instead: a heap of n items, so
+O(len(records) log n) time and O(n) memory, and records may be any iterable or generator.
+copy_records=True returns shallow copies that can be edited without touching the source.
+'''
+import copy
+import heapq
+from operator import itemgetter
+
+
+def top_n(records, key, n, reverse=True, copy_records=False):
+    """The n records with the largest key (the smallest with reverse=False).
+
+    key is either a callable or the name of the field to sort by. The result equals
+    sorted(records, key=key, reverse=reverse)[:n], ties keeping their original order.
+    """
+    if not callable(key):
+        key = itemgetter(key)
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    top = select(n, records, key=key)
+    if copy_records:
+        # shallow copies, enough to edit the top records without touching the source
+        top = [copy.copy(record) for record in top]
+    return top
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    records = [{'key': f'test{i}', 'order': random.randrange(1000)} for i in range(10**6)]
+    assert top_n(records, 'order', 10) == sorted(records, key=itemgetter('order'), reverse=True)[:10]
+    assert top_n(records, 'order', 10, reverse=False) == sorted(records, key=itemgetter('order'))[:10]
+
+    start_time = time.time()
+    sorted(records, key=itemgetter('order'), reverse=True)[:10]
+    print(f'sorted: {time.time() - start_time} seconds')
+    start_time = time.time()
+    top_n(records, 'order', 10)
+    print(f'top_n: {time.time() - start_time} seconds')
+    start_time = time.time()
+    top_n((record for record in records), 'order', 10)
+    print(f'top_n on a generator: {time.time() - start_time} seconds')
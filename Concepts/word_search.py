@@ -7,19 +7,60 @@ Do not include documents where the keyword string shows up only as a part of a l
 She does not want you to distinguish upper case from lower case letters. So the phrase “Closed the case.” would be included when the keyword is “closed”
 Do not let periods or commas affect what is matched. “It is closed.” would be included when the keyword is “closed”. But you can assume there are no other types of punctuation.
 """
+from instrumentation import timed
 
 
+def normalize(doc):
+    # Split the string doc into a list of words (according to whitespace)
+    tokens = doc.split()
+    # Make a transformed list where we 'normalize' each word to facilitate matching.
+    # Periods and commas are removed from the end of each word, and it's set to all lowercase.
+    return [token.rstrip('.,').lower() for token in tokens]
+
+
+@timed
 def word_search(documents, keyword):
     # list to hold the indices of matching documents
     indices = [] 
     # Iterate through the indices (i) and elements (doc) of documents
     for i, doc in enumerate(documents):
-        # Split the string doc into a list of words (according to whitespace)
-        tokens = doc.split()
-        # Make a transformed list where we 'normalize' each word to facilitate matching.
-        # Periods and commas are removed from the end of each word, and it's set to all lowercase.
-        normalized = [token.rstrip('.,').lower() for token in tokens]
+        normalized = normalize(doc)
         # Is there a match? If so, update the list of matching indices.
         if keyword.lower() in normalized:
             indices.append(i)
-    return indices
\ No newline at end of file
+    return indices
+
+
+@timed
+def multi_word_search(documents, keywords):
+    # Same rules as word_search, but every document is normalized once for all keywords:
+    # the intersection of its word set with the keyword set costs O(min(words, keywords)).
+    wanted = {keyword.lower() for keyword in keywords}
+    found = {word: [] for word in wanted}
+    for i, doc in enumerate(documents):
+        for word in wanted.intersection(normalize(doc)):
+            found[word].append(i)
+    return {keyword: list(found[keyword.lower()]) for keyword in keywords}
+
+
+if __name__ == '__main__':
+    import random
+    import timeit
+
+    random.seed(0)
+    vocabulary = [f'word{i}' for i in range(20000)] + ['closed', 'enclosed', 'Closed.', 'case,']
+    documents = [' '.join(random.choices(vocabulary, k=30)) for _ in range(2000)]
+
+    keywords = random.sample(vocabulary, 10) + ['Closed', 'case']
+    result = multi_word_search(documents, keywords)
+    assert result == {keyword: word_search(documents, keyword) for keyword in keywords}
+
+    # word_search grows linearly with the number of keywords, multi_word_search barely moves
+    number_iter = 1
+    for num_keywords in [1, 10, 100, 1000, 10000]:
+        keywords = random.sample(vocabulary, num_keywords)
+        multi_time = timeit.timeit(lambda: multi_word_search(documents, keywords), number=number_iter)
+        print(f'{num_keywords} keywords, multi_word_search_time: {multi_time/number_iter} seconds')
+        if num_keywords <= 100:
+            loop_time = timeit.timeit(lambda: [word_search(documents, k) for k in keywords], number=number_iter)
+            print(f'{num_keywords} keywords, word_search_time: {loop_time/number_iter} seconds')
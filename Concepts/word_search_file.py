@@ -0,0 +1,102 @@
+'''
+word_search over a newline-delimited corpus file that does not fit in memory
+
+Each line of the file is one document. The file is memory-mapped and cut into byte ranges that
+end on a line boundary, worker processes scan the ranges in parallel, and the matching document
+indices are yielded lazily and in order. Only one range per worker is ever held in memory.
+
+The matching rules are the ones from word_search (normalize() is shared), so
+    list(iter_word_search_file(path, keyword)) == word_search(read_documents(path), keyword)
+'''
+import mmap
+import os
+from multiprocessing import Pool
+
+from word_search import normalize
+
+CHUNK_SIZE = 32 * 1024 * 1024
+
+
+def read_documents(path, encoding='utf-8'):
+    """Load the corpus as the list of documents word_search expects (one per b'\\n' line)."""
+    with open(path, 'rb') as f:
+        return [line.rstrip(b'\n').decode(encoding) for line in f]
+
+
+def line_ranges(path, chunk_size=CHUNK_SIZE):
+    """Split the file into (start, end) byte ranges of about chunk_size that end after a newline."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    ranges = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            newline = mm.find(b'\n', min(start + chunk_size, size) - 1)
+            end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _scan_range(task):
+    """Return (local indices of matching documents, number of documents) for one byte range."""
+    path, start, end, keyword, encoding = task
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = mm[start:end].decode(encoding).split('\n')
+    # a range always ends with a newline except maybe the last one, which leaves an empty tail
+    if lines[-1] == '':
+        lines.pop()
+    # Cheap substring test before tokenizing. Only safe for ASCII keywords: lower() is context
+    # free for those characters, so a whole-word match is always a substring of line.lower().
+    prefilter = keyword.isascii()
+    matches = [i for i, line in enumerate(lines)
+               if (not prefilter or keyword in line.lower()) and keyword in normalize(line)]
+    return matches, len(lines)
+
+
+def iter_word_search_file(path, keyword, processes=None, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """Yield the indices of the documents (lines) in path that contain keyword, in order."""
+    keyword = keyword.lower()
+    tasks = [(path, start, end, keyword, encoding) for start, end in line_ranges(path, chunk_size)]
+    if not tasks:
+        return
+    offset = 0
+    with Pool(processes) as pool:
+        # imap keeps the results in task order, so the running offset gives global indices
+        for matches, num_documents in pool.imap(_scan_range, tasks):
+            for i in matches:
+                yield offset + i
+            offset += num_documents
+
+
+def word_search_file(path, keyword, processes=None, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    return list(iter_word_search_file(path, keyword, processes, chunk_size, encoding))
+
+
+if __name__ == '__main__':
+    import random
+    import tempfile
+    import time
+
+    from word_search import word_search
+
+    random.seed(0)
+    vocabulary = [f'word{i}' for i in range(5000)] + ['closed', 'enclosed', 'Closed.', 'case,', 'ΟΔΟΣ']
+    path = os.path.join(tempfile.mkdtemp(), 'corpus.txt')
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(50000):
+            f.write(' '.join(random.choices(vocabulary, k=30)) + '\n')
+        f.write('last line without newline, closed.')
+
+    documents = read_documents(path)
+    for keyword in ['closed', 'Case', 'οδος', 'missing']:
+        # a tiny chunk_size forces many ranges to exercise the boundary handling
+        assert word_search_file(path, keyword, chunk_size=4096) == word_search(documents, keyword)
+
+    start_time = time.time()
+    word_search(read_documents(path), 'closed')
+    print(f'word_search_time: {time.time() - start_time} seconds')
+    start_time = time.time()
+    word_search_file(path, 'closed', chunk_size=1024 * 1024)
+    print(f'word_search_file_time: {time.time() - start_time} seconds')
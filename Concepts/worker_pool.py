@@ -0,0 +1,131 @@
+'''
+Persistent worker pool with chunked task dispatch
+
+multi_processing.py starts one multiprocessing.Process per job: every job pays for a process
+start-up, and without join() the reported run time only covers starting them. WorkerPool starts
+its workers once and feeds them tasks in chunks (one pickle round trip per chunk, not per task):
+- imap: results in input order; as_completed: (index, result) as soon as each chunk finishes
+- a task that raises re-raises the same exception in the caller, with the worker traceback as
+  its __cause__
+- every task is timed inside the worker, so stats reports the real per-task run time
+- used as a context manager it shuts down cleanly: close + join, or terminate on error
+'''
+import time
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import Pool, Process
+
+
+@dataclass
+class TaskStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+
+def _timed_call(func, indexed_arg):
+    index, arg = indexed_arg
+    start = time.perf_counter()
+    result = func(arg)
+    return index, result, time.perf_counter() - start
+
+
+class WorkerPool:
+    def __init__(self, processes=None, chunksize=64):
+        self.chunksize = chunksize
+        self.stats = TaskStats()
+        self._pool = Pool(processes)
+
+    def _run(self, func, iterable, chunksize, ordered):
+        imap = self._pool.imap if ordered else self._pool.imap_unordered
+        for index, result, elapsed in imap(partial(_timed_call, func), enumerate(iterable),
+                                           chunksize or self.chunksize):
+            self.stats.add(elapsed)
+            yield index, result
+
+    def imap(self, func, iterable, chunksize=None):
+        """Yield func(arg) for every arg, in input order."""
+        for _, result in self._run(func, iterable, chunksize, ordered=True):
+            yield result
+
+    def as_completed(self, func, iterable, chunksize=None):
+        """Yield (index, func(arg)) pairs in completion order."""
+        return self._run(func, iterable, chunksize, ordered=False)
+
+    def map(self, func, iterable, chunksize=None):
+        return list(self.imap(func, iterable, chunksize))
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+
+def square(x):
+    return x * x
+
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError(f'bad task {x}')
+    return x
+
+
+def spawn_per_job(func, args, max_alive=64):
+    """The multi_processing.py pattern, one Process per task, joined so the timing is real."""
+    jobs = []
+    for arg in args:
+        p = Process(target=func, args=(arg,))
+        p.start()
+        jobs.append(p)
+        # cap the number of live processes so 10k jobs do not exhaust the machine
+        if len(jobs) >= max_alive:
+            jobs.pop(0).join()
+    for p in jobs:
+        p.join()
+
+
+if __name__ == '__main__':
+    import sys
+
+    num_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 10**4
+
+    with WorkerPool() as pool:
+        assert pool.map(square, range(100)) == [x * x for x in range(100)]
+        assert sorted(pool.as_completed(square, range(10), chunksize=3)) == [(x, x * x) for x in range(10)]
+        try:
+            pool.map(fail_on_three, range(10))
+        except ValueError as e:
+            print(f'worker exception propagated: {e!r}')
+
+    start_time = time.time()
+    with WorkerPool() as pool:
+        for _ in pool.imap(square, range(num_tasks)):
+            pass
+    print(f'{num_tasks} tasks, WorkerPool: {time.time() - start_time} seconds, '
+          f'mean task time {pool.stats.mean * 1e6:.1f} us')
+
+    start_time = time.time()
+    spawn_per_job(square, range(num_tasks))
+    print(f'{num_tasks} tasks, spawn per job: {time.time() - start_time} seconds')
@@ -0,0 +1,97 @@
+'''
+Vectorised versions of the two group_apply.py patterns
+
+    g1[['B', 'C']].apply(lambda x: x / x.sum())                        -> group_normalize
+    g1[['B', 'C']].apply(lambda x: x.astype(float).max() - x.min())    -> group_range
+
+groupby.apply calls the lambda once per group, so with hundreds of thousands of groups the Python
+call overhead is all that gets measured. Here the keys are factorized once (sorted codes, like
+groupby's sort=True), the rows are stably sorted by code, every per-group reduction is a single
+ufunc.reduceat over the group boundaries, and per-row results broadcast the group values back with
+group_values[codes], the way transform does.
+
+Both functions return the same frames as the apply versions, including the group_keys=True
+(MultiIndex of key and original index, rows in group order) and group_keys=False (original index
+and row order) layouts. As in groupby, rows with a missing key are dropped and NaN values are
+skipped by the reductions.
+'''
+import numpy as np
+import pandas as pd
+
+
+def _factorize(df, by):
+    codes, uniques = pd.factorize(df[by], sort=True)
+    keep = np.flatnonzero(codes >= 0) if (codes < 0).any() else np.arange(len(codes))
+    # stable, so rows keep their original order inside each group
+    order = keep[np.argsort(codes[keep], kind='stable')]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else order
+    return codes, uniques, keep, order, starts
+
+
+def _values(df, columns):
+    values = df[columns].to_numpy()
+    if values.dtype.kind != 'f':
+        values = values.astype(np.float64)
+    return values
+
+
+def group_normalize(df, by, columns, group_keys=True):
+    """df.groupby(by, group_keys=group_keys)[columns].apply(lambda x: x / x.sum())"""
+    codes, uniques, keep, order, starts = _factorize(df, by)
+    values = _values(df, columns)
+    sorted_values = values[order]
+    sums = np.add.reduceat(np.where(np.isnan(sorted_values), 0, sorted_values), starts, axis=0)
+    rows = order if group_keys else keep
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = values[rows] / sums[codes[rows]]
+    if group_keys:
+        index = pd.MultiIndex.from_arrays([uniques.take(codes[rows]), df.index[rows]],
+                                          names=[by, df.index.name])
+    else:
+        index = df.index[rows]
+    return pd.DataFrame(normalized, index=index, columns=columns)
+
+
+def group_range(df, by, columns):
+    """df.groupby(by)[columns].apply(lambda x: x.astype(float).max() - x.min()), either group_keys."""
+    _, uniques, _, order, starts = _factorize(df, by)
+    sorted_values = _values(df, columns)[order].astype(np.float64, copy=False)
+    # fmax / fmin ignore NaN unless the whole group is NaN, like Series.max / min
+    spread = np.fmax.reduceat(sorted_values, starts, axis=0) - np.fmin.reduceat(sorted_values, starts, axis=0)
+    return pd.DataFrame(spread, index=pd.Index(uniques, name=by), columns=columns)
+
+
+if __name__ == '__main__':
+    import timeit
+
+    df = pd.DataFrame({'A': 'a a b'.split(),
+                       'B': [1, 2, 3],
+                       'C': [4, 6, 5]})
+    print(group_normalize(df, 'A', ['B', 'C'], group_keys=False))
+    print(group_normalize(df, 'A', ['B', 'C'], group_keys=True))
+    print(group_range(df, 'A', ['B', 'C']))
+
+    rng = np.random.default_rng(0)
+    number_iter = 1
+    for num_groups in [10, 100, 1000, 10000]:
+        n = max(10 * num_groups, 10**5)
+        df = pd.DataFrame({'A': rng.integers(0, num_groups, n).astype(str),
+                           'B': rng.integers(1, 100, n),
+                           'C': rng.random(n)},
+                          index=rng.permutation(n))
+        df.loc[df.index[:5], 'C'] = np.nan
+        for group_keys in [False, True]:
+            g = df.groupby('A', group_keys=group_keys)[['B', 'C']]
+            pd.testing.assert_frame_equal(group_normalize(df, 'A', ['B', 'C'], group_keys),
+                                          g.apply(lambda x: x / x.sum()))
+        pd.testing.assert_frame_equal(group_range(df, 'A', ['B', 'C']),
+                                      g.apply(lambda x: x.astype(float).max() - x.min()))
+
+        g = df.groupby('A', group_keys=False)[['B', 'C']]
+        apply_time = timeit.timeit(lambda: g.apply(lambda x: x / x.sum()), number=number_iter)
+        vector_time = timeit.timeit(lambda: group_normalize(df, 'A', ['B', 'C'], False), number=number_iter)
+        print(f'{num_groups} groups normalize: apply {apply_time/number_iter:.4f}s, group_ops {vector_time/number_iter:.4f}s')
+        apply_time = timeit.timeit(lambda: g.apply(lambda x: x.astype(float).max() - x.min()), number=number_iter)
+        vector_time = timeit.timeit(lambda: group_range(df, 'A', ['B', 'C']), number=number_iter)
+        print(f'{num_groups} groups range: apply {apply_time/number_iter:.4f}s, group_ops {vector_time/number_iter:.4f}s')
@@ -0,0 +1,209 @@
+'''
+Compact singly linked lists
+
+linked_list.py builds the concept: Node objects with a __dict__, a head pointer only, so appending
+walks the whole list (O(n)) and there is no way to loop over it with for.
+
+LinkedList keeps the same shape but
+- Node uses __slots__, no per-node __dict__ (48 instead of ~90 bytes per node)
+- head and tail pointers: append, prepend and popleft are O(1)
+- __iter__ / __len__, bulk extend and from_iterable
+
+PooledLinkedList goes further and drops the node objects: values and next pointers live in two
+parallel arrays (a list of values and an array('q') of next indices), nodes are integer slots,
+and popped slots are recycled through a free list. That is 16 bytes per element plus the value.
+'''
+from array import array
+
+
+class Node:
+    __slots__ = ('val', 'next')
+
+    def __init__(self, val=None, next=None):
+        self.val = val
+        self.next = next
+
+
+class LinkedList:
+    def __init__(self, iterable=()):
+        self.head = None
+        self.tail = None
+        self._size = 0
+        self.extend(iterable)
+
+    @classmethod
+    def from_iterable(cls, iterable):
+        return cls(iterable)
+
+    def append(self, val):
+        node = Node(val)
+        if self.tail is None:
+            self.head = node
+        else:
+            self.tail.next = node
+        self.tail = node
+        self._size += 1
+
+    def prepend(self, val):
+        self.head = Node(val, self.head)
+        if self.tail is None:
+            self.tail = self.head
+        self._size += 1
+
+    def popleft(self):
+        if self.head is None:
+            raise IndexError('popleft from an empty linked list')
+        node = self.head
+        self.head = node.next
+        if self.head is None:
+            self.tail = None
+        self._size -= 1
+        return node.val
+
+    def extend(self, iterable):
+        # link the new nodes in one go, only touching self once at the end
+        iterator = iter(iterable)
+        for val in iterator:
+            first = last = Node(val)
+            count = 1
+            for val in iterator:
+                last.next = last = Node(val)
+                count += 1
+            if self.tail is None:
+                self.head = first
+            else:
+                self.tail.next = first
+            self.tail = last
+            self._size += count
+
+    def __iter__(self):
+        cur = self.head
+        while cur is not None:
+            yield cur.val
+            cur = cur.next
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)!r})'
+
+
+class PooledLinkedList:
+    """Linked list whose nodes are slots in two parallel arrays instead of objects."""
+    NIL = -1
+
+    def __init__(self, iterable=()):
+        self._vals = []
+        self._next = array('q')
+        self._free = self.NIL
+        self.head = self.NIL
+        self.tail = self.NIL
+        self._size = 0
+        self.extend(iterable)
+
+    @classmethod
+    def from_iterable(cls, iterable):
+        return cls(iterable)
+
+    def _new_node(self, val, next):
+        if self._free != self.NIL:
+            node = self._free
+            self._free = self._next[node]
+            self._vals[node] = val
+            self._next[node] = next
+        else:
+            node = len(self._vals)
+            self._vals.append(val)
+            self._next.append(next)
+        return node
+
+    def append(self, val):
+        node = self._new_node(val, self.NIL)
+        if self.tail == self.NIL:
+            self.head = node
+        else:
+            self._next[self.tail] = node
+        self.tail = node
+        self._size += 1
+
+    def prepend(self, val):
+        self.head = self._new_node(val, self.head)
+        if self.tail == self.NIL:
+            self.tail = self.head
+        self._size += 1
+
+    def popleft(self):
+        node = self.head
+        if node == self.NIL:
+            raise IndexError('popleft from an empty linked list')
+        val = self._vals[node]
+        self.head = self._next[node]
+        if self.head == self.NIL:
+            self.tail = self.NIL
+        # recycle the slot and drop the reference to the value
+        self._vals[node] = None
+        self._next[node] = self._free
+        self._free = node
+        self._size -= 1
+        return val
+
+    def extend(self, iterable):
+        append = self.append
+        for val in iterable:
+            append(val)
+
+    def __iter__(self):
+        vals, next_ = self._vals, self._next
+        cur = self.head
+        while cur != self.NIL:
+            yield vals[cur]
+            cur = next_[cur]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)!r})'
+
+
+if __name__ == '__main__':
+    import timeit
+    import tracemalloc
+    from collections import deque
+
+    for cls in [LinkedList, PooledLinkedList]:
+        days = cls.from_iterable(['Mon', 'Tue', 'Wed'])
+        days.prepend('Sun')
+        days.append('Thu')
+        assert list(days) == ['Sun', 'Mon', 'Tue', 'Wed', 'Thu'] and len(days) == 5
+        assert days.popleft() == 'Sun'
+        days.extend(['Fri', 'Sat'])
+        days.prepend('Sun')
+        print(days)
+
+    n = 10**5
+    number_iter = 5
+    # the same value object everywhere, so only the container overhead is measured
+    value = object()
+
+    def fill_and_drain(cls):
+        container = cls()
+        # list has no popleft and pop(0) is O(n), so it drains from the end instead
+        pop = container.pop if cls is list else container.popleft
+        for _ in range(n):
+            container.append(value)
+        for _ in container:
+            pass
+        for _ in range(n):
+            pop()
+
+    for name, cls in [('list', list), ('deque', deque), ('LinkedList', LinkedList), ('PooledLinkedList', PooledLinkedList)]:
+        tracemalloc.start()
+        container = cls([value] * n)
+        per_element = tracemalloc.get_traced_memory()[0] / n
+        tracemalloc.stop()
+        del container
+        run_time = timeit.timeit(lambda: fill_and_drain(cls), number=number_iter)
+        print(f'{name}: {per_element:.1f} bytes per element, '
+              f'{3 * n * number_iter / run_time:,.0f} ops/sec (append + iterate + pop)')
@@ -0,0 +1,259 @@
+'''
+Parallel document extraction over FormalParserInterface-style parsers
+
+formal_interface.py defines the parser interface (load_data_source / extract_text) but ends by
+instantiating EmlParserNew, which raises TypeError, so it cannot be imported. ParserInterface
+below is its __subclasshook__ version: any class with both methods implements it, no
+inheritance needed.
+
+The two methods have different costs, so they run on different pools:
+- load_data_source(path, file_name) reads the document (I/O bound: network storage, object
+  stores), on a thread pool
+- extract_text(data) parses what load_data_source returned (CPU bound), on a process pool, so the
+  parser instance and the data must be picklable
+
+extract_directory routes every file to the parser registered for its extension and yields one
+dict per document as soon as it is done. At most max_in_flight documents are being loaded,
+waiting or parsed at any time, so memory stays bounded however many files the directory holds.
+ExtractionStats counts documents, bytes, errors and time per parser.
+'''
+import abc
+import email
+import email.policy
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+
+class ParserInterface(metaclass=abc.ABCMeta):
+    @classmethod
+    def __subclasshook__(cls, subclass):
+        return (hasattr(subclass, 'load_data_source') and
+                callable(subclass.load_data_source) and
+                hasattr(subclass, 'extract_text') and
+                callable(subclass.extract_text) or
+                NotImplemented)
+
+
+class FileParser:
+    """load_data_source for local files: the raw bytes."""
+
+    def load_data_source(self, path: str, file_name: str) -> bytes:
+        with open(os.path.join(path, file_name), 'rb') as f:
+            return f.read()
+
+
+class TxtParser(FileParser):
+    """Extract text from a plain text file."""
+
+    def extract_text(self, data: bytes) -> dict:
+        return {'text': data.decode('utf-8', errors='replace')}
+
+
+class EmlParser(FileParser):
+    """Extract text from an email."""
+
+    def extract_text(self, data: bytes) -> dict:
+        message = email.message_from_bytes(data, policy=email.policy.default)
+        body = message.get_body(preferencelist=('plain', 'html'))
+        return {'subject': message['subject'], 'from': message['from'],
+                'text': body.get_content() if body is not None else ''}
+
+
+class PdfParser(FileParser):
+    """Extract text from a PDF: the (...) Tj strings of uncompressed content streams.
+
+    A stand-in that needs no PDF library; a real deployment registers a parser built on one.
+    """
+    TEXT = re.compile(rb'\(((?:[^()\\]|\\.)*)\)\s*Tj')
+
+    def extract_text(self, data: bytes) -> dict:
+        if not data.startswith(b'%PDF-'):
+            raise ValueError('not a PDF file')
+        return {'text': ' '.join(match.decode('latin-1') for match in self.TEXT.findall(data))}
+
+
+class ParserRegistry:
+    def __init__(self):
+        self._parsers = {}
+
+    def register(self, *extensions):
+        """Class decorator: @registry.register('.eml') registers an instance for those extensions."""
+        def decorator(parser_class):
+            for extension in extensions:
+                self.add(extension, parser_class())
+            return parser_class
+        return decorator
+
+    def add(self, extension, parser):
+        if not isinstance(parser, ParserInterface):
+            raise TypeError(f'{type(parser).__name__} does not implement load_data_source and extract_text')
+        self._parsers[extension.lower()] = parser
+
+    def get(self, file_name):
+        return self._parsers.get(os.path.splitext(file_name)[1].lower())
+
+
+@dataclass
+class ParserStats:
+    documents: int = 0
+    errors: int = 0
+    bytes: int = 0
+    load_seconds: float = 0.0
+    extract_seconds: float = 0.0
+
+
+@dataclass
+class ExtractionStats:
+    parsers: dict = field(default_factory=dict)
+    skipped: int = 0
+    seconds: float = 0.0
+
+    def parser(self, name):
+        return self.parsers.setdefault(name, ParserStats())
+
+    def report(self):
+        # docs per busy second: per worker throughput, from the time spent inside the parser calls
+        lines = [f'{"parser":<16} {"docs":>8} {"errors":>8} {"MB":>8} {"load s":>8} {"extract s":>10} {"docs/busy s":>12}']
+        for name, stats in sorted(self.parsers.items()):
+            busy = stats.load_seconds + stats.extract_seconds
+            rate = stats.documents / busy if busy else 0.0
+            lines.append(f'{name:<16} {stats.documents:>8} {stats.errors:>8} {stats.bytes / 2**20:>8.1f} '
+                         f'{stats.load_seconds:>8.2f} {stats.extract_seconds:>10.2f} {rate:>12.0f}')
+        documents = sum(stats.documents for stats in self.parsers.values())
+        rate = documents / self.seconds if self.seconds else 0.0
+        lines.append(f'{documents} documents in {self.seconds:.2f} seconds ({rate:.0f} docs/s), '
+                     f'{self.skipped} files without a parser')
+        return '\n'.join(lines)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def iter_files(directory):
+    for root, _, file_names in os.walk(directory):
+        for file_name in sorted(file_names):
+            yield root, file_name
+
+
+def extract_directory(directory, registry, io_workers=16, cpu_workers=None, max_in_flight=256, stats=None):
+    """Yield {'path', 'parser', 'ok', ...} for every file with a registered parser, in completion order.
+
+    A successful document carries the keys of its extract_text dict, a failed one an 'error'.
+    """
+    stats = stats if stats is not None else ExtractionStats()
+    start = time.perf_counter()
+    files = iter_files(directory)
+    pending = {}
+    with ThreadPoolExecutor(io_workers) as threads, ProcessPoolExecutor(cpu_workers) as processes:
+        try:
+            while True:
+                # top up the loads, without holding more than max_in_flight documents
+                while len(pending) < max_in_flight:
+                    try:
+                        path, file_name = next(files)
+                    except StopIteration:
+                        break
+                    parser = registry.get(file_name)
+                    if parser is None:
+                        stats.skipped += 1
+                        continue
+                    future = threads.submit(_timed, parser.load_data_source, path, file_name)
+                    pending[future] = ('load', os.path.join(path, file_name), parser)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, full_path, parser = pending.pop(future)
+                    parser_stats = stats.parser(type(parser).__name__)
+                    try:
+                        result, elapsed = future.result()
+                    except Exception as e:
+                        parser_stats.errors += 1
+                        yield {'path': full_path, 'parser': type(parser).__name__, 'ok': False,
+                               'error': f'{stage}: {e!r}'}
+                        continue
+                    if stage == 'load':
+                        parser_stats.load_seconds += elapsed
+                        parser_stats.bytes += len(result)
+                        pending[processes.submit(_timed, parser.extract_text, result)] = ('extract', full_path, parser)
+                    else:
+                        parser_stats.extract_seconds += elapsed
+                        parser_stats.documents += 1
+                        yield {'path': full_path, 'parser': type(parser).__name__, 'ok': True, **result}
+        finally:
+            for future in pending:
+                future.cancel()
+            stats.seconds += time.perf_counter() - start
+
+
+def extract_serial(directory, registry):
+    """The loop being replaced: load and extract one document after the other."""
+    for path, file_name in iter_files(directory):
+        parser = registry.get(file_name)
+        if parser is None:
+            continue
+        try:
+            result = parser.extract_text(parser.load_data_source(path, file_name))
+        except Exception as e:
+            yield {'path': os.path.join(path, file_name), 'parser': type(parser).__name__, 'ok': False, 'error': repr(e)}
+        else:
+            yield {'path': os.path.join(path, file_name), 'parser': type(parser).__name__, 'ok': True, **result}
+
+
+class RemoteEmlParser(EmlParser):
+    """EmlParser on network storage: 20 ms per read."""
+
+    def load_data_source(self, path: str, file_name: str) -> bytes:
+        time.sleep(0.02)
+        return super().load_data_source(path, file_name)
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    num_documents = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    class MissingExtract:
+        def load_data_source(self, path, file_name):
+            pass
+
+    registry = ParserRegistry()
+    registry.register('.txt')(TxtParser)
+    registry.register('.pdf')(PdfParser)
+    registry.register('.eml')(RemoteEmlParser)
+    try:
+        registry.add('.doc', MissingExtract())
+    except TypeError as e:
+        print(f'rejected: {e}')
+
+    directory = tempfile.mkdtemp()
+    for i in range(num_documents):
+        with open(os.path.join(directory, f'mail{i}.eml'), 'w') as f:
+            f.write(f'From: sender{i}@example.com\nSubject: ticket {i}\n\nThe process issue {i} is closed.\n')
+        with open(os.path.join(directory, f'report{i}.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4\nBT (Quarterly report) Tj (page ' + str(i).encode() + b') Tj ET\n' * 200)
+        with open(os.path.join(directory, f'notes{i}.txt'), 'w') as f:
+            f.write(f'notes {i}\n' * 100)
+    with open(os.path.join(directory, 'broken.pdf'), 'wb') as f:
+        f.write(b'not a pdf')
+    with open(os.path.join(directory, 'image.png'), 'wb') as f:
+        f.write(b'\x89PNG')
+
+    start_time = time.time()
+    expected = {result['path']: result for result in extract_serial(directory, registry)}
+    print(f'serial: {time.time() - start_time} seconds')
+
+    stats = ExtractionStats()
+    results = {result['path']: result for result in extract_directory(directory, registry, stats=stats)}
+    print(f'pipeline: {stats.seconds} seconds')
+    print(stats.report())
+    assert results.keys() == expected.keys()
+    assert all(results[path]['ok'] == expected[path]['ok'] for path in results)
+    assert results[os.path.join(directory, 'mail7.eml')]['subject'] == 'ticket 7'
@@ -0,0 +1,187 @@
+'''
+Structural interfaces with cached subclass checks
+
+interface.py's ParserMeta and PersonMeta answer every isinstance / issubclass call by probing the
+class again with hasattr / callable. abc.ABCMeta caches its answers. StructuralMeta gives the
+interface.py answers and adds the cache:
+- the required methods are declared on the interface, __required_methods__ = ('name', 'age'),
+  and inherited by interfaces built from it
+- a class implements the interface when every required method is a callable attribute, or when
+  it (or one of its bases) was registered with Interface.register(cls); as in interface.py the
+  check is purely structural, inheriting from the interface alone is not enough
+- isinstance(obj, Interface) checks type(obj), as ParserMeta.__instancecheck__ does
+
+Results, positive and negative, are cached per interface by id(class) with a weak reference to
+the class whose callback drops the entry when the class is garbage collected. (A WeakSet lookup
+builds a new weakref on every call and costs about as much as the two hasattr probes it would
+save.) Every cache is dropped when a class is registered, when an attribute of a class built
+with StructuralMeta is set or deleted, or when invalidate_caches() is called.
+
+Unlike interface.py, the answer for a plain class is not re-probed: Python does not expose a
+version of a class's attributes to key the cache on. Code that adds or removes a method of a
+plain class after it has been checked must call invalidate_caches(), the same limitation ABCMeta
+has; until then isinstance / issubclass give the old answer.
+'''
+import weakref
+
+_invalidation_counter = 0
+
+
+def invalidate_caches():
+    """Drop the cached results of every structural interface."""
+    global _invalidation_counter
+    _invalidation_counter += 1
+
+
+class _CheckCache:
+    __slots__ = ('version', 'entries')
+
+    def __init__(self):
+        self.version = _invalidation_counter
+        # id(class) -> (result, weakref to the class)
+        self.entries = {}
+
+
+def _forget(entries, key):
+    def callback(ref):
+        entry = entries.get(key)
+        if entry is not None and entry[1] is ref:
+            del entries[key]
+    return callback
+
+
+class StructuralMeta(type):
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        cls = super().__new__(mcls, name, bases, namespace, **kwargs)
+        required = list(namespace.get('__required_methods__', ()))
+        for base in bases:
+            required.extend(getattr(base, '__required_methods__', ()))
+        type.__setattr__(cls, '__required_methods__', tuple(dict.fromkeys(required)))
+        type.__setattr__(cls, '_registry', weakref.WeakSet())
+        type.__setattr__(cls, '_check_cache', _CheckCache())
+        return cls
+
+    def register(cls, subclass):
+        """Make subclass (and its subclasses) implement the interface; usable as a class decorator."""
+        cls._registry.add(subclass)
+        invalidate_caches()
+        return subclass
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        invalidate_caches()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        invalidate_caches()
+
+    def _implements(cls, subclass):
+        if all(callable(getattr(subclass, method, None)) for method in cls.__required_methods__):
+            return True
+        mro = getattr(subclass, '__mro__', ())
+        return any(registered in mro for registered in cls._registry)
+
+    def __subclasscheck__(cls, subclass):
+        if not isinstance(subclass, type):
+            raise TypeError('issubclass() arg 1 must be a class')
+        cache = cls._check_cache
+        if cache.version != _invalidation_counter:
+            cache.entries.clear()
+            cache.version = _invalidation_counter
+        key = id(subclass)
+        entry = cache.entries.get(key)
+        if entry is not None:
+            return entry[0]
+        result = cls._implements(subclass)
+        cache.entries[key] = (result, weakref.ref(subclass, _forget(cache.entries, key)))
+        return result
+
+    def __instancecheck__(cls, instance):
+        # the cached path of __subclasscheck__, inlined: isinstance is the hot call
+        cache = cls._check_cache
+        if cache.version == _invalidation_counter:
+            entry = cache.entries.get(id(type(instance)))
+            if entry is not None:
+                return entry[0]
+        return cls.__subclasscheck__(type(instance))
+
+
+class ParserInterface(metaclass=StructuralMeta):
+    """interface.py's UpdatedInformalParserInterface with a cached check."""
+    __required_methods__ = ('load_data_source', 'extract_text')
+
+
+class Person(metaclass=StructuralMeta):
+    """interface.py's Person with a cached check."""
+    __required_methods__ = ('name', 'age')
+
+
+if __name__ == '__main__':
+    import abc
+    import contextlib
+    import gc
+    import io
+    import timeit
+
+    # interface.py prints its examples when imported
+    with contextlib.redirect_stdout(io.StringIO()):
+        import interface
+
+    class AbcParserInterface(metaclass=abc.ABCMeta):
+        # formal_interface.py's __subclasshook__ version
+        @classmethod
+        def __subclasshook__(cls, subclass):
+            return (hasattr(subclass, 'load_data_source') and
+                    callable(subclass.load_data_source) and
+                    hasattr(subclass, 'extract_text') and
+                    callable(subclass.extract_text) or
+                    NotImplemented)
+
+    # same answers as interface.py
+    for interface_class, structural in [(interface.UpdatedInformalParserInterface, ParserInterface),
+                                        (interface.Person, Person)]:
+        for cls in [interface.PdfParserNew, interface.EmlParserNew, interface.Employee, interface.Friend,
+                    interface.PdfParser, interface.EmlParser, int]:
+            assert issubclass(cls, interface_class) == issubclass(cls, structural), (cls, structural)
+
+    # invalidation: a class gaining the missing method after it was checked
+    class Draft:
+        def load_data_source(self, path, file_name):
+            pass
+
+    assert not isinstance(Draft(), ParserInterface)
+    Draft.extract_text = lambda self, full_file_path: {}
+    # a plain class cannot announce the change (see the module docstring)
+    invalidate_caches()
+    assert isinstance(Draft(), ParserInterface)
+    try:
+        issubclass(Draft(), ParserInterface)
+    except TypeError as e:
+        print(e)
+    ParserInterface.register(int)
+    assert isinstance(1, ParserInterface) and issubclass(bool, ParserInterface)
+
+    # entries go away with their class
+    class Temporary:
+        pass
+
+    issubclass(Temporary, Person)
+    entries = len(Person._check_cache.entries)
+    del Temporary
+    gc.collect()
+    assert len(Person._check_cache.entries) == entries - 1
+
+    number = 10**6
+    pdf, eml = interface.PdfParserNew(), interface.EmlParserNew()
+    friend = interface.Friend()
+    for name, parser_interface, person_interface in [
+            ('ParserMeta / PersonMeta', interface.UpdatedInformalParserInterface, interface.Person),
+            ('ABCMeta', AbcParserInterface, None),
+            ('StructuralMeta', ParserInterface, Person)]:
+        hit = timeit.timeit(lambda: isinstance(pdf, parser_interface), number=number)
+        miss = timeit.timeit(lambda: isinstance(eml, parser_interface), number=number)
+        line = f'{name:<24} parser: {hit * 1e9 / number:6.0f} ns match, {miss * 1e9 / number:6.0f} ns no match'
+        if person_interface is not None:
+            friend_time = timeit.timeit(lambda: isinstance(friend, person_interface), number=number)
+            line += f', person: {friend_time * 1e9 / number:6.0f} ns'
+        print(line)
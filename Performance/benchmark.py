@@ -0,0 +1,155 @@
+'''
+Reusable benchmark harness
+
+A Suite holds a setup(n) function that builds the input data for size n, and the strategies to
+compare, registered as plugins with @suite.register. suite.run() sweeps every strategy over the
+sizes; for each (strategy, n) it
+1. warms up (first-call caches, lazy imports, JIT compilation)
+2. times `repeat` runs of `number` calls with time.perf_counter and keeps median / p95 / min
+3. measures the peak memory of one extra call with tracemalloc (numpy and pandas report their
+   buffers to it), on a separate call so the tracing does not slow the timed ones down
+
+Results are plain dicts written to JSON with the environment they were measured in, and
+compare() flags every (strategy, n) whose median got slower than a saved baseline.
+
+    python loop_vs_vectorisation.py --sizes 10000 100000 --output results.json
+    python loop_vs_vectorisation.py --sizes 10000 100000 --compare results.json
+
+With Concepts/instrumentation.py importable (Concepts/ on sys.path) and INSTRUMENTATION=1, every
+strategy call is also recorded in its latency histograms as benchmark.<suite>.<strategy>.
+'''
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    from instrumentation import timed
+except ImportError:
+    def timed(func, name=None):
+        return func
+
+
+class Suite:
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+        self.strategies = {}
+
+    def register(self, name=None, max_n=None):
+        """Decorator registering func(data) as a strategy; max_n skips sizes it is too slow for."""
+        def decorator(func):
+            strategy = name or func.__name__
+            self.strategies[strategy] = (timed(func, name=f'benchmark.{self.name}.{strategy}'), max_n)
+            return func
+        return decorator
+
+    def run(self, sizes, strategies=None, warmup=1, repeat=5, number=1):
+        results = []
+        for n in sizes:
+            data = self.setup(n)
+            for name, (func, max_n) in self.strategies.items():
+                if (strategies and name not in strategies) or (max_n is not None and n > max_n):
+                    continue
+                for _ in range(warmup):
+                    func(data)
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    for _ in range(number):
+                        func(data)
+                    times.append((time.perf_counter() - start) / number)
+                tracemalloc.start()
+                func(data)
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                results.append({
+                    'strategy': name,
+                    'n': n,
+                    'median': statistics.median(times),
+                    'p95': _percentile(times, 95),
+                    'min': min(times),
+                    'peak_bytes': peak_bytes,
+                    'repeat': repeat,
+                    'number': number,
+                })
+                print(_format(results[-1]), flush=True)
+        return {'suite': self.name, 'environment': environment(), 'results': results}
+
+    def main(self, argv=None):
+        parser = argparse.ArgumentParser(description=f'Benchmark suite {self.name}')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10**3, 10**4, 10**5])
+        parser.add_argument('--strategies', nargs='+', choices=sorted(self.strategies))
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--number', type=int, default=1)
+        parser.add_argument('--output', help='write the results to this JSON file')
+        parser.add_argument('--compare', help='baseline JSON file to check the results against')
+        parser.add_argument('--tolerance', type=float, default=0.10,
+                            help='allowed slowdown of the median before flagging a regression')
+        args = parser.parse_args(argv)
+
+        report = self.run(args.sizes, args.strategies, args.warmup, args.repeat, args.number)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            regressions = compare(report, baseline, args.tolerance)
+            if regressions:
+                sys.exit(1)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    rank = (len(values) - 1) * percent / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def _format(result):
+    return (f"{result['strategy']:>24} n={result['n']:<10} median {result['median']:.6f}s "
+            f"p95 {result['p95']:.6f}s peak {result['peak_bytes'] / 2**20:.2f} MiB")
+
+
+def environment():
+    versions = {}
+    for module in ['numpy', 'pandas', 'numba']:
+        if module in sys.modules:
+            versions[module] = getattr(sys.modules[module], '__version__', None)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'processor': platform.processor(),
+        'modules': versions,
+    }
+
+
+def compare(report, baseline, tolerance=0.10):
+    """Print current vs baseline medians and return the (strategy, n) pairs slower than tolerance."""
+    previous = {(r['strategy'], r['n']): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get((result['strategy'], result['n']))
+        if old is None:
+            continue
+        if old['median'] > 0:
+            ratio = result['median'] / old['median']
+            regressed = ratio > 1 + tolerance
+            change = f'{ratio:.2f}x'
+        else:
+            # a baseline below the clock resolution gives no ratio to compare against
+            regressed = False
+            change = 'n/a'
+        if regressed:
+            regressions.append((result['strategy'], result['n']))
+        print(f"{result['strategy']:>24} n={result['n']:<10} {old['median']:.6f}s -> {result['median']:.6f}s "
+              f"({change}){'  REGRESSION' if regressed else ''}")
+    return regressions
@@ -1,18 +1,25 @@
 # comment from https://stackoverflow.com/questions/52673285/performance-of-pandas-apply-vs-np-vectorize-to-create-new-column-from-existing-c
 # https://numba.pydata.org/
 
+# Every strategy below is registered on the `suite` and run by the harness in benchmark.py,
+# which sweeps the sizes, repeats, and writes / compares JSON results:
+#   python loop_vs_vectorisation.py --sizes 10000 100000 1000000 --output baseline.json
+
 import numpy as np
 import pandas as pd
-import timeit 
 
-np.random.seed(0)
-N = 10**5
-number_iter = 2
+from benchmark import Suite
+from safe_divide import safe_divide
+
+
+def make_frame(N):
+    np.random.seed(0)
+    A_list = np.random.randint(1, 100, N)
+    B_list = np.random.randint(1, 100, N)
+    return pd.DataFrame({'A': A_list, 'B': B_list})
 
-A_list = np.random.randint(1, 100, N)
-B_list = np.random.randint(1, 100, N)
-df = pd.DataFrame({'A': A_list, 'B': B_list})
-df.head()
+
+suite = Suite('loop_vs_vectorisation', setup=make_frame)
 
 
 def divide(a, b):
@@ -48,21 +55,42 @@ np.vectorize: fake vectorisation
 - In short, np.vectorize does what a Python-level loop should do, but pd.DataFrame.apply adds a chunky overhead.
 
 '''
-list_map_time = timeit.timeit(lambda: list(map(divide, df['A'], df['B'])), number=number_iter)
-numpy_vectorize_time = timeit.timeit(lambda: np.vectorize(divide)(df['A'], df['B']), number=number_iter)
-dataframe_zip_time = timeit.timeit(lambda: [divide(a, b) for a, b in zip(df['A'], df['B'])], number=number_iter)
-itertuples_time = timeit.timeit(lambda: [divide(a, b) for a, b in df[['A', 'B']].itertuples(index=False)], number=number_iter)
-apply_raw_time = timeit.timeit(lambda: df.apply(lambda row: divide(*row), axis=1, raw=True), number=number_iter)
-apply_no_raw_time = timeit.timeit(lambda: df.apply(lambda row: divide(row['A'], row['B']), axis=1), number=number_iter)
-iterrows_time = timeit.timeit(lambda: [divide(row['A'], row['B']) for _, row in df[['A', 'B']].iterrows()], number=number_iter)
-
-print(f'list_map_time: {list_map_time/number_iter} seconds')
-print(f'numpy_vectorize_time: {numpy_vectorize_time/number_iter} seconds')
-print(f'dataframe_zip_time: {dataframe_zip_time/number_iter} seconds')
-print(f'itertuples_time: {itertuples_time/number_iter} seconds')
-print(f'apply_raw_time: {apply_raw_time/number_iter} seconds')
-print(f'apply_no_raw_time: {apply_no_raw_time/number_iter} seconds')
-print(f'iterrows_time: {iterrows_time/number_iter} seconds')
+# The Python-level loops are hopeless at the largest sizes, max_n keeps the sweep finishing
+
+
+@suite.register('list_map', max_n=10**6)
+def list_map(df):
+    return list(map(divide, df['A'], df['B']))
+
+
+@suite.register('numpy_vectorize', max_n=10**6)
+def numpy_vectorize(df):
+    return np.vectorize(divide)(df['A'], df['B'])
+
+
+@suite.register('dataframe_zip', max_n=10**6)
+def dataframe_zip(df):
+    return [divide(a, b) for a, b in zip(df['A'], df['B'])]
+
+
+@suite.register('itertuples', max_n=10**6)
+def itertuples(df):
+    return [divide(a, b) for a, b in df[['A', 'B']].itertuples(index=False)]
+
+
+@suite.register('apply_raw', max_n=10**6)
+def apply_raw(df):
+    return df.apply(lambda row: divide(*row), axis=1, raw=True)
+
+
+@suite.register('apply_no_raw', max_n=10**5)
+def apply_no_raw(df):
+    return df.apply(lambda row: divide(row['A'], row['B']), axis=1)
+
+
+@suite.register('iterrows', max_n=10**5)
+def iterrows(df):
+    return [divide(row['A'], row['B']) for _, row in df[['A', 'B']].iterrows()]
 
 
 '''
@@ -71,12 +99,63 @@ Real vectorisation
 Why aren't the above differences mentioned anywhere? Because the performance of truly vectorised calculations make them irrelevant:
 '''
 
-np_where_time = timeit.timeit(lambda: np.where(df['B'] == 0, 0, df['A'] / df['B']), number=number_iter)
-np_where_time_2 = timeit.timeit(lambda: (df['A'] / df['B']).replace([np.inf, -np.inf], 0), number=number_iter)
 
-njit_time = timeit.timeit(lambda: divide_njit(df['A'].values, df['B'].values), number=number_iter)
 
-print('Real Vectorisation')
-print(f'np_where_time: {np_where_time/number_iter} seconds')
-print(f'np_where_time_2: {np_where_time_2/number_iter} seconds')
-print(f'njit_time: {njit_time/number_iter} seconds')
\ No newline at end of file
+@suite.register('np_where')
+def np_where(df):
+    return np.where(df['B'] == 0, 0, df['A'] / df['B'])
+
+
+@suite.register('np_where_2')
+def np_where_2(df):
+    return (df['A'] / df['B']).replace([np.inf, -np.inf], 0)
+
+
+@suite.register('divide_njit', max_n=10**6)
+def njit(df):
+    return divide_njit(df['A'].values, df['B'].values)
+
+
+'''
+Allocation-free vectorisation
+
+np.where above still allocates a full-size mask, quotient and result for every call. safe_divide writes into
+a reused out= buffer, chunk by chunk, so its peak memory stays flat however big N gets, and the threaded
+variant spreads the chunks over the cores (numpy releases the GIL inside np.divide). Compare at scale with
+    python loop_vs_vectorisation.py --sizes 100000000 --strategies np_where safe_divide safe_divide_threads
+'''
+_out_buffers = {}
+
+
+def _out_buffer(n):
+    if n not in _out_buffers:
+        _out_buffers[n] = np.empty(n)
+    return _out_buffers[n]
+
+
+@suite.register('safe_divide')
+def safe_divide_single(df):
+    return safe_divide(df['A'].to_numpy(), df['B'].to_numpy(), out=_out_buffer(len(df)))
+
+
+@suite.register('safe_divide_threads')
+def safe_divide_threads(df):
+    return safe_divide(df['A'].to_numpy(), df['B'].to_numpy(), out=_out_buffer(len(df)), workers=None)
+
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    # the divide_njit loop compiled for real, only when numba is installed
+    divide_numba = numba.njit(cache=True)(divide_njit)
+
+    @suite.register('divide_numba')
+    def numba_njit(df):
+        return divide_numba(df['A'].values, df['B'].values)
+
+
+if __name__ == '__main__':
+    suite.main()
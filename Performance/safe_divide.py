@@ -0,0 +1,86 @@
+'''
+Safe divide kernel: a / b, 0 where b == 0
+
+np.where(df['B'] == 0, 0, df['A'] / df['B']) allocates a full-size boolean mask, a full-size
+quotient and the full-size result, and divides by zero (inf/nan plus a RuntimeWarning) before
+throwing those values away. safe_divide instead
+- writes into a caller-provided out= buffer, so a hot loop can reuse one buffer
+- walks the arrays in cache-sized chunks and calls np.divide(..., where=b != 0) per chunk, so the
+  only temporary is a chunk-sized mask, reused per thread, and nothing is ever divided by zero
+- spreads the chunks over a thread pool: numpy releases the GIL inside ufunc loops, so the
+  threads really run in parallel
+
+At 10^8 rows the np.where version allocates ~1.7 GB per call; this allocates a few hundred KB.
+'''
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+# 64K elements: the a, b and out chunks (8 bytes each) plus the mask stay within L2
+CHUNK_SIZE = 2**16
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _executor(workers):
+    # one long-lived pool per worker count, creating threads on every call costs more than small divisions
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='safe_divide')
+
+
+def _mask_buffer(size):
+    mask = getattr(_local, 'mask', None)
+    if mask is None or len(mask) < size:
+        mask = _local.mask = np.empty(size, dtype=bool)
+    return mask[:size]
+
+
+def _divide_chunk(a, b, out, start, end):
+    out_chunk = out[start:end]
+    b_chunk = b[start:end]
+    mask = np.not_equal(b_chunk, 0, out=_mask_buffer(len(b_chunk)))
+    out_chunk.fill(0)
+    np.divide(a[start:end], b_chunk, out=out_chunk, where=mask)
+
+
+def safe_divide(a, b, out=None, chunk_size=CHUNK_SIZE, workers=1):
+    """a / b element-wise with 0 where b == 0, written into out (a new float64 array if None).
+
+    workers > 1 processes the chunks on a thread pool; workers=None uses one thread per CPU.
+    """
+    a = np.asarray(a)
+    b = np.asarray(b)
+    if a.ndim != 1 or a.shape != b.shape:
+        raise ValueError(f'a and b must be 1-d arrays of the same length, got {a.shape} and {b.shape}')
+    if out is None:
+        out = np.empty(a.shape, dtype=np.float64)
+    elif out.shape != a.shape:
+        raise ValueError(f'out must have shape {a.shape}, got {out.shape}')
+    starts = range(0, len(a), chunk_size)
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(starts) == 1:
+        for start in starts:
+            _divide_chunk(a, b, out, start, start + chunk_size)
+    else:
+        futures = [_executor(workers).submit(_divide_chunk, a, b, out, start, start + chunk_size)
+                   for start in starts]
+        for future in futures:
+            future.result()
+    return out
+
+
+if __name__ == '__main__':
+    a = np.array([1, 2, 3, 4, 0])
+    b = np.array([2, 0, 3, 0, 0])
+    print(safe_divide(a, b))
+    rng = np.random.default_rng(0)
+    a = rng.integers(0, 100, 10**6)
+    b = rng.integers(0, 5, 10**6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = np.where(b == 0, 0, a / b)
+    out = np.empty(len(a))
+    assert np.array_equal(safe_divide(a, b, out=out, chunk_size=1000, workers=4), expected)
+    assert np.array_equal(safe_divide(a, b, workers=None), expected)
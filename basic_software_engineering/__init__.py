@@ -0,0 +1,102 @@
+'''
+The repository's tools as one importable package
+
+The modules stay in their topic folders (Concepts/, Data Frame/, ...) and stay runnable as
+scripts; the folder names contain spaces, so the folders are not packages themselves. This
+package maps every tool module to its folder and imports it on first access:
+
+    import basic_software_engineering as bse
+    bse.word_search.word_search(documents, 'casino')   # imports Concepts/word_search.py now
+    bse.load('group_ops')                               # the same, by name
+
+Importing the package imports nothing else, so numpy, pandas and sklearn are only loaded by the
+tools that use them. The folder of a loaded module is appended to sys.path, so its imports of
+sibling modules resolve to the same module objects, as when it is run as a script.
+
+The modules are found in the topic folders of the checkout the package sits in, which a plain
+`pip install .` does not copy: install with `pip install -e .`. Without the folders, load()
+raises CheckoutNotFoundError (an ImportError) saying so.
+
+Only modules without work at import time are listed; the tutorial scripts that print or compute
+when imported are run with `bse run <script>` (cli.py).
+'''
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FOLDERS = ['Concepts', 'Data Frame', 'Data Structures', 'Object Oriented Progamming', 'Performance',
+           'machine learning']
+
+MODULES = {
+    'http_cache': 'Concepts',
+    'instrumentation': 'Concepts',
+    'json_fetcher': 'Concepts',
+    'json_stream': 'Concepts',
+    'label_metrics': 'Concepts',
+    'memoize': 'Concepts',
+    'pipeline': 'Concepts',
+    'prediction_decoder': 'Concepts',
+    'records_view': 'Concepts',
+    'shared_arrays': 'Concepts',
+    'top_k': 'Concepts',
+    'top_n': 'Concepts',
+    'word_index': 'Concepts',
+    'word_search': 'Concepts',
+    'word_search_file': 'Concepts',
+    'worker_pool': 'Concepts',
+    'chunked_groupby': 'Data Frame',
+    'group_ops': 'Data Frame',
+    'compact_linked_list': 'Data Structures',
+    'extraction_pipeline': 'Object Oriented Progamming',
+    'structural_interface': 'Object Oriented Progamming',
+    'benchmark': 'Performance',
+    'loop_vs_vectorisation': 'Performance',
+    'safe_divide': 'Performance',
+    'confusion_accumulator': 'machine learning',
+    'sharded_evaluation': 'machine learning',
+}
+
+__all__ = ['load', 'folder_path', 'add_folder', 'CheckoutNotFoundError', 'ROOT', 'FOLDERS', 'MODULES'] + sorted(MODULES)
+
+
+class CheckoutNotFoundError(ImportError):
+    pass
+
+
+def folder_path(folder):
+    """The directory of a topic folder; CheckoutNotFoundError when installed without the checkout."""
+    directory = os.path.join(ROOT, folder)
+    if not os.path.isdir(directory):
+        raise CheckoutNotFoundError(f'topic folder {directory!r} not found: basic_software_engineering needs the '
+                          f'repository checkout, editable install required (pip install -e <checkout>)')
+    return directory
+
+
+def add_folder(folder):
+    directory = folder_path(folder)
+    if directory not in sys.path:
+        sys.path.append(directory)
+    return directory
+
+
+def load(name):
+    """Import the tool module name from its folder."""
+    try:
+        folder = MODULES[name]
+    except KeyError:
+        raise ImportError(f'unknown tool module {name!r}') from None
+    add_folder(folder)
+    # tools in other folders import Concepts/instrumentation.py when they find it
+    add_folder('Concepts')
+    return importlib.import_module(name)
+
+
+def __getattr__(name):
+    if name in MODULES:
+        return load(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(MODULES))
@@ -0,0 +1,5 @@
+import sys
+
+from basic_software_engineering.cli import main
+
+sys.exit(main())
@@ -0,0 +1,260 @@
+'''
+bse: one command line entry point for the repository's tools
+
+    bse word-search articles.txt casino        # matching line numbers, Concepts/word_search_file.py
+    bse evaluate actual.txt predicted.txt      # confusion_matrix.py's output, as JSON
+    bse normalize data.csv out.csv --by A --columns B C
+    bse export-jsonl data.csv out.jsonl
+    bse fetch URL [URL ...] --cache .http_cache
+    bse benchmark --sizes 1000 10000           # Performance/loop_vs_vectorisation.py
+    bse run confusion_matrix                   # any script of the repository, as __main__
+    bse list
+    bse import-time                            # startup report and the --help budget check
+
+Startup budget: `bse --help` must finish in under HELP_BUDGET_MS (50 ms), interpreter start-up
+included, and interpreter start-up alone takes 15-25 ms. So:
+- this module imports only os, sys and the package, which imports nothing
+- the top-level usage is a static text and commands are dispatched from the COMMANDS table;
+  argparse (about 15 ms with the modules its help formatting pulls in) is imported only when a
+  command parses its own options
+- every command imports its tool, and with it numpy / pandas / sklearn, inside its handler
+`bse import-time` measures it with python -X importtime and fails when the budget is exceeded.
+'''
+import os
+import sys
+
+import basic_software_engineering as package
+
+HELP_BUDGET_MS = 50
+
+
+def _read_labels(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def cmd_word_search(args):
+    word_search_file = package.load('word_search_file')
+    for index in word_search_file.iter_word_search_file(args.path, args.keyword, args.processes):
+        print(index)
+
+
+def cmd_evaluate(args):
+    import json
+
+    y_actual, y_pred = _read_labels(args.actual), _read_labels(args.predicted)
+    if args.processes > 1:
+        accumulator = package.load('sharded_evaluation').evaluate_sharded(y_actual, y_pred, args.processes)
+    else:
+        accumulator = package.load('confusion_accumulator').ConfusionAccumulator()
+        accumulator.update(y_actual, y_pred)
+    print(json.dumps(accumulator.output(), indent=args.indent))
+
+
+def cmd_normalize(args):
+    chunked_groupby = package.load('chunked_groupby')
+    chunked_groupby.normalize_csv(args.path, args.output, args.by, args.columns, chunksize=args.chunksize)
+
+
+def cmd_export_jsonl(args):
+    import pandas as pd
+
+    records_view = package.load('records_view')
+    records_view.export_jsonl(pd.read_csv(args.path), args.output, max_unique_ratio=args.max_unique_ratio)
+
+
+def cmd_fetch(args):
+    import json
+
+    json_fetcher = package.load('json_fetcher')
+    cache = package.load('http_cache').HttpCache(args.cache, ttl=args.ttl) if args.cache else None
+    fetcher = json_fetcher.JsonFetcher(workers=args.workers, timeout=args.timeout, cache=cache)
+    for url, result in fetcher.fetch_all(args.urls):
+        if isinstance(result, Exception):
+            print(json.dumps({'url': url, 'error': str(result)}))
+        else:
+            print(json.dumps({'url': url, 'result': result}))
+
+
+def cmd_benchmark(argv):
+    # the suite parses its own options (Performance/benchmark.py)
+    package.load('loop_vs_vectorisation').suite.main(argv)
+
+
+def scripts():
+    """script name -> path, for every .py file in the topic folders."""
+    found = {}
+    for folder in package.FOLDERS:
+        directory = package.folder_path(folder)
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.endswith('.py'):
+                found[file_name[:-3]] = os.path.join(directory, file_name)
+    return found
+
+
+def cmd_run(argv):
+    import runpy
+
+    if not argv or argv[0] in ('-h', '--help'):
+        print('usage: bse run <script> [args ...]\n\nRun a script of the repository as __main__, see bse list.')
+        return 0 if argv else 2
+    path = scripts().get(argv[0])
+    if path is None:
+        print(f'bse run: no script named {argv[0]!r}, see bse list', file=sys.stderr)
+        return 2
+    package.add_folder(os.path.basename(os.path.dirname(path)))
+    sys.argv = [path] + argv[1:]
+    runpy.run_path(path, run_name='__main__')
+
+
+def cmd_list(args):
+    found = scripts()
+    print('modules (import basic_software_engineering as bse; bse.<name>):')
+    for name, folder in sorted(package.MODULES.items(), key=lambda item: (item[1], item[0])):
+        print(f'  {name:<24} {folder}')
+    print('scripts (bse run <name>):')
+    for name, path in found.items():
+        if name not in package.MODULES:
+            print(f'  {name:<24} {os.path.relpath(os.path.dirname(path), package.ROOT)}')
+
+
+def _import_times(stderr):
+    """(cumulative us, self us, module) for every line of a -X importtime report."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def cmd_import_time(args):
+    import statistics
+    import subprocess
+    import time
+
+    if args.module:
+        command = [sys.executable, '-c', f'import basic_software_engineering as bse; bse.load({args.module!r})']
+    else:
+        command = [sys.executable, '-m', 'basic_software_engineering', '--help']
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package.ROOT, os.environ.get('PYTHONPATH')])))
+
+    wall = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        wall.append((time.perf_counter() - start) * 1e3)
+    report = subprocess.run(command[:1] + ['-X', 'importtime'] + command[1:], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    rows = _import_times(report.stderr)
+
+    print(f'{"cumulative ms":>14} {"self ms":>9}  module')
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f'{cumulative_us / 1e3:>14.1f} {self_us / 1e3:>9.1f}  {name}')
+    heavy = sorted({name.strip().split('.')[0] for _, _, name in rows} & {'numpy', 'pandas', 'sklearn'})
+    print(f'heavy libraries imported: {", ".join(heavy) or "none"}')
+    median = statistics.median(wall)
+    print(f'{" ".join(command[1:])}: median {median:.1f} ms, min {min(wall):.1f} ms over {args.repeat} runs')
+    if not args.module:
+        print(f'--help budget {args.budget:.0f} ms: {"ok" if median <= args.budget else "EXCEEDED"}')
+        return 0 if median <= args.budget else 1
+    return 0
+
+
+def word_search_options(parser):
+    parser.add_argument('path')
+    parser.add_argument('keyword')
+    parser.add_argument('--processes', type=int)
+    return cmd_word_search
+
+
+def evaluate_options(parser):
+    parser.add_argument('actual')
+    parser.add_argument('predicted')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--indent', type=int)
+    return cmd_evaluate
+
+
+def normalize_options(parser):
+    parser.add_argument('path')
+    parser.add_argument('output')
+    parser.add_argument('--by', required=True)
+    parser.add_argument('--columns', nargs='+', required=True)
+    parser.add_argument('--chunksize', type=int, default=10**5)
+    return cmd_normalize
+
+
+def export_jsonl_options(parser):
+    parser.add_argument('path')
+    parser.add_argument('output')
+    parser.add_argument('--max-unique-ratio', type=float, default=0.5)
+    return cmd_export_jsonl
+
+
+def fetch_options(parser):
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--cache', help='HTTP cache directory')
+    parser.add_argument('--ttl', type=float, default=300)
+    return cmd_fetch
+
+
+def list_options(parser):
+    return cmd_list
+
+
+def import_time_options(parser):
+    parser.add_argument('--module', help='report the import of this tool module instead of bse --help')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget', type=float, default=HELP_BUDGET_MS, help='milliseconds')
+    return cmd_import_time
+
+
+# command -> (description, options): options(parser) adds the argparse options and returns the handler;
+# options None means the handler takes the raw arguments
+COMMANDS = {
+    'word-search': ('line numbers of the documents of a file containing a keyword', word_search_options),
+    'evaluate': ('precision / recall / f1 per label, one label per line in each file', evaluate_options),
+    'normalize': ('divide CSV columns by their group sum, chunk by chunk', normalize_options),
+    'export-jsonl': ('write a CSV as compact JSON lines', export_jsonl_options),
+    'fetch': ('fetch JSON URLs concurrently, one JSON line per URL', fetch_options),
+    'benchmark': ('the loop vs vectorisation benchmark suite', None),
+    'run': ('run a script of the repository as __main__', None),
+    'list': ('list the tool modules and scripts', list_options),
+    'import-time': ('import-time report and --help budget check', import_time_options),
+}
+RAW_HANDLERS = {'benchmark': cmd_benchmark, 'run': cmd_run}
+
+
+def usage():
+    lines = ['usage: bse <command> [options]', '', "Run the repository's tools.", '', 'commands:']
+    lines += [f'  {name:<14} {description}' for name, (description, _) in COMMANDS.items()]
+    lines += ['', 'bse <command> --help shows the options of a command.']
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    name, argv = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f'{usage()}\n\nbse: unknown command {name!r}', file=sys.stderr)
+        return 2
+    description, options = COMMANDS[name]
+    try:
+        if options is None:
+            return RAW_HANDLERS[name](argv) or 0
+        import argparse
+
+        parser = argparse.ArgumentParser(prog=f'bse {name}', description=description)
+        handler = options(parser)
+        return handler(parser.parse_args(argv)) or 0
+    except package.CheckoutNotFoundError as e:
+        print(f'bse {name}: {e}', file=sys.stderr)
+        return 1
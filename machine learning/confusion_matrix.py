@@ -59,3 +59,16 @@ output = {
 }
 
 print(output)
+
+
+'''
+The same output without the Python loops: ConfusionAccumulator builds the confusion matrix with
+np.bincount and derives accuracy, the break_down and the weighted averages from it.
+'''
+from confusion_accumulator import ConfusionAccumulator
+
+accumulator = ConfusionAccumulator()
+accumulator.update(y_actual, y_pred)
+
+print('accuracy = ', accumulator.accuracy(), correct / len(y_actual))
+print(accumulator.output())
@@ -0,0 +1,71 @@
+'''
+Sharded parallel evaluation with mergeable ConfusionAccumulator partials
+
+The evaluation data is cut into shards, every worker process builds the confusion matrix of its
+shard, and the partial matrices are merged into the final break_down and weighted scores.
+Because merging only adds counts, the partials can be combined as they complete, in any order,
+and partials serialised with to_dict() on other machines can be merged in later:
+
+    total = merge_partials(ConfusionAccumulator.from_dict(json.load(f)) for f in partial_files)
+'''
+from functools import reduce
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from confusion_accumulator import ConfusionAccumulator
+
+
+def evaluate_shard(shard):
+    y_actual, y_pred = shard
+    return ConfusionAccumulator().update(y_actual, y_pred)
+
+
+def merge_partials(partials):
+    return reduce(ConfusionAccumulator.merge, partials, ConfusionAccumulator())
+
+
+def evaluate_sharded(y_actual, y_pred, processes=None, num_shards=None):
+    """ConfusionAccumulator over (y_actual, y_pred), computed shard by shard in a process pool."""
+    y_actual = np.asarray(y_actual)
+    y_pred = np.asarray(y_pred)
+    if y_actual.shape != y_pred.shape:
+        raise ValueError(f'y_actual and y_pred must be the same length, got {y_actual.shape} and {y_pred.shape}')
+    processes = processes or cpu_count()
+    num_shards = num_shards or processes
+    bounds = np.linspace(0, len(y_actual), num_shards + 1).astype(int)
+    shards = ((y_actual[start:end], y_pred[start:end]) for start, end in zip(bounds[:-1], bounds[1:]))
+    with Pool(processes) as pool:
+        return merge_partials(pool.imap_unordered(evaluate_shard, shards))
+
+
+if __name__ == '__main__':
+    import json
+    import time
+
+    from sklearn.metrics import precision_recall_fscore_support
+
+    rng = np.random.default_rng(0)
+    labels = np.array([f'A{i}' for i in range(20)])
+    num_samples = 2 * 10**6
+    y_actual = labels[rng.integers(0, len(labels), num_samples)]
+    y_pred = np.where(rng.random(num_samples) < 0.7, y_actual, labels[rng.integers(0, len(labels), num_samples)])
+
+    start_time = time.time()
+    sharded = evaluate_sharded(y_actual, y_pred, num_shards=8)
+    print(f'sharded_time: {time.time() - start_time} seconds')
+
+    start_time = time.time()
+    precision, recall, fscore, support = precision_recall_fscore_support(
+        y_actual, y_pred, labels=sorted(set(y_actual)))
+    print(f'sklearn_time: {time.time() - start_time} seconds')
+
+    _, p, r, f, s = sharded.scores()
+    assert np.allclose(p, precision) and np.allclose(r, recall) and np.allclose(f, fscore)
+    assert (s == support).all()
+
+    # partials round-tripped through JSON, merged in a different grouping, give the same matrix
+    partials = [json.loads(json.dumps(evaluate_shard((y_actual[i::3], y_pred[i::3])).to_dict())) for i in range(3)]
+    a, b, c = (ConfusionAccumulator.from_dict(partial) for partial in partials)
+    assert ((a + b) + c).output() == (c + (b + a)).output() == sharded.output()
+    print(sharded.output())